@@ -1,112 +1,184 @@
 #!/usr/bin/env python3
 # Python 3.6
+import os
 import hlt
 from hlt import constants
-from hlt.positionals import Direction
+from hlt.common import FrameReader
 import logging
+from budget import TurnBudget
 from modes import Modes
 from navigation import Navigation
+from profiler import TurnProfiler
+
+BOT_NAME = "Snowcola_v12"
+# fractions of MAX_HALITE
+HALITE_THRESHOLD = 0.1
+SHIP_FULL = 0.95
+
+
+def plan_ship(nav, ship):
+    """set a ship's destination and request its move"""
+    ship_full = constants.MAX_HALITE * SHIP_FULL
+    halite_threshold = constants.MAX_HALITE * HALITE_THRESHOLD
+    state = nav.state(ship)
+
+    #                   #
+    # set destinations  #
+    #                   #
+    if state.mode == Modes.ENDGAME:
+        # ensure ships are going to dropoff in engame stage
+        nav.recall(ship)
+
+    elif state.mode == Modes.COLLECTING:
+        # TODO: need method detect and unstick to get ship unstuck
+        if ship.halite_amount >= ship_full and nav.destination(ship):
+            # go to nearest dropoff point
+            nav.go_home(ship)
 
-# This game object contains the initial game state.
-game = hlt.Game()
-
-# initialize constants
-MAX_HALITE = constants.MAX_HALITE
-MAX_TURNS = constants.MAX_TURNS
-HALITE_THRESHOLD = MAX_HALITE * 0.1
-SHIP_FULL = MAX_HALITE * 0.95
-directions = [
-    Direction.North, Direction.South, Direction.East, Direction.West,
-    Direction.Still
-]
-
-# official game start
-game.ready("Snowcola_v12")
-# log bot id to log
-logging.info("Successfully created bot! My Player ID is {}.".format(
-    game.my_id))
-
-# initialize map and starting cluster map
-nav = Navigation(game)
-
-#                 #
-# Start Game Loop #
-#                 #
-
-while True:
-    # get latest gamestate info from the halite engine
-    game.update_frame()
-    game_map = game.game_map
-    me = game.me
-    ships = me.get_ships()
-
-    # update bot data
-    nav.update(game)
+        elif not nav.destination(ship) or nav.dest_halite(
+                ship) < halite_threshold:
+            # go to nearest high value halite cluster
+            nav.select_rich_destination(ship)
 
-    for ship in ships:
-        state = nav.state(ship)
+    elif state.mode == Modes.DEPOSITING:
+        if nav.deposit_complete(ship):
+            # go to nearest high value halite cluster and
+            # switch to collection mode
+            nav.select_rich_destination(ship)
+            nav.set_mode(ship, Modes.COLLECTING)
 
-        #                   #
-        # set destinations  #
-        #                   #
-        if nav.game_mode is Modes.ENDGAME:
-            # ensure ships are going to dropoff in engame stage
+        elif not nav.going_home(ship) or not nav.destination(ship):
             nav.go_home(ship)
 
-        elif state.mode is Modes.COLLECTING:
-            # TODO: need method detect and unstick to get ship unstuck
-            if ship.halite_amount >= SHIP_FULL and state.destination:
-                # go to nearest dropoff point
-                nav.go_home(ship)
-
-            elif not state.destination or nav.dest_halite(
-                    ship) < HALITE_THRESHOLD:
-                # go to nearest high value halite cluster
-                nav.select_rich_destination(ship)
-
-        elif state.mode is Modes.DEPOSITING:
-            if nav.deposit_complete(ship):
-                # go to nearest high value halite cluster and
-                # switch to collection mode
-                nav.select_rich_destination(ship)
-                nav.set_mode(ship, Modes.COLLECTING)
-
-            elif not nav.going_home(ship) or not state.destination:
-                nav.go_home(ship)
-
-        #                #
-        # calculate move #
-        #                #
-
-        # special case to ignore collisions at end game
-        if nav.game_mode is Modes.ENDGAME:
-            if nav.adjacent_dest(ship):
-                nav.kamikaze(ship)
-            else:
-                nav.navigate_bline(ship)
-            # TODO: only invovke this when right next to the dropoff
-
-        # handout nav instructions
-        elif state.mode is Modes.COLLECTING:
-            if nav.on_dropoff(ship):
-                nav.leave_dropoff(ship)
-
-            elif nav.should_move(ship):
-                nav.navigate_max_halite(ship)
-
-            else:
-                nav.stay_still(ship)
-
-        elif state.mode is Modes.DEPOSITING:
-            nav.navigate_bline(ship)
+    #                #
+    # calculate move #
+    #                #
+
+    # special case to ignore collisions at end game
+    if state.mode == Modes.ENDGAME:
+        if nav.adjacent_dest(ship):
+            nav.kamikaze(ship)
         else:
+            nav.navigate_home(ship)
+        # TODO: only invovke this when right next to the dropoff
+
+    # handout nav instructions
+    elif state.mode == Modes.COLLECTING:
+        if nav.on_dropoff(ship):
+            nav.leave_dropoff(ship)
+
+        elif nav.should_move(ship):
+            nav.navigate_max_halite(ship)
+
+        else:
+            nav.stay_still(ship)
+
+    elif state.mode == Modes.DEPOSITING:
+        nav.navigate_home(ship)
+
+    elif state.mode == Modes.BUILDING:
+        if nav.can_build_dropoff(ship):
+            nav.build_dropoff(ship)
+        elif ship.position == nav.destination(ship):
+            # wait on the site until we can afford the dropoff
             nav.stay_still(ship)
+        else:
+            nav.navigate_bline(ship)
+    else:
+        nav.stay_still(ship)
 
-    if nav.can_produce():
-        #add class method for this
-        nav.command(me.shipyard, me.shipyard.spawn())
 
-    nav.report_game_state()
-    nav.process_turn()
-    # Send your moves back to the game environment, ending this turn.
-    game.end_turn(nav.command_queue)
+def play_turn(game, nav, budget, profiler=None):
+    """plan every ship for the current frame and return the turn's commands"""
+    # the engine's clock runs from sending the frame, so parsing it counts
+    budget.start(game.frame_received)
+    if profiler:
+        profiler.start_turn(game.turn_number)
+    me = game.me
+    ships = me.get_ships()
+    planned = 0
+
+    try:
+        # update bot data
+        with budget.phase("update"):
+            nav.update(game)
+
+        # plan the ships that matter most first, so if time runs out
+        # only the least important ones fall back to a cheap move
+        with budget.phase("ships"):
+            for ship in nav.planning_order(ships):
+                if budget.exhausted():
+                    nav.fallback(ship)
+                    continue
+                try:
+                    plan_ship(nav, ship)
+                    planned += 1
+                except Exception:
+                    logging.exception(f"failed to plan {ship}")
+                    nav.fallback(ship)
+
+        with budget.phase("resolve"):
+            nav.process_turn()
+
+        if nav.can_produce():
+            nav.spawn()
+
+        nav.report_game_state()
+    except Exception:
+        # never miss a turn, send whatever commands were made
+        logging.exception(f"turn {game.turn_number} failed")
+
+    budget.report(planned=f"{planned}/{len(ships)} ships")
+    if profiler:
+        profiler.end_turn(game, budget.phases)
+    return nav.command_queue
+
+
+def make_bot(game, profiler=None):
+    """
+    Set up the bot for a loaded game
+    :param profiler: optional TurnProfiler to time the bot's turns with
+    :return: a function taking the game after each frame update and returning that turn's commands
+    """
+    nav = Navigation(game)
+    budget = TurnBudget()
+    if profiler:
+        profiler.instrument(nav)
+    return lambda game: play_turn(game, nav, budget, profiler)
+
+
+def main():
+    # This game object contains the initial game state.
+    # Set HALITE_RECORD to a path to save the raw engine input for benchmarks,
+    # and HALITE_LOG to "debug" or "async" for full logs (see hlt.logs).
+    game = hlt.Game(
+        array_map=True,
+        reader=FrameReader(record=os.environ.get("HALITE_RECORD")),
+        log_profile=os.environ.get("HALITE_LOG", "production"))
+
+    # official game start
+    game.ready(BOT_NAME)
+    # log bot id to log
+    logging.info("Successfully created bot! My Player ID is {}.".format(
+        game.my_id))
+
+    # Set HALITE_PROFILE to a directory to write per-turn timings to.
+    profiler = TurnProfiler.from_environment(game.my_id)
+    profiler.instrument(game, ["update_frame"])
+
+    # initialize map and starting cluster map
+    bot = make_bot(game, profiler)
+
+    #                 #
+    # Start Game Loop #
+    #                 #
+
+    while True:
+        # get latest gamestate info from the halite engine
+        game.update_frame()
+        # Send your moves back to the game environment, ending this turn.
+        game.end_turn(bot(game))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Offline benchmarks for the bot. Run them from the repository root, e.g.
+python -m benchmarks.frame_parsing
+"""
@@ -0,0 +1,112 @@
+"""
+Benchmark of cluster scoring on 64x64 maps: the Cluster-object scan that
+Navigation.richest_clusters used to do every turn against ClusterScorer.
+Both must pick the same clusters, which is checked before timing them.
+
+Usage: python -m benchmarks.clusters
+"""
+import random
+import time
+
+import numpy as np
+
+from hlt.game_map import ArrayGameMap, GameMap
+from hlt.positionals import Position
+
+from clusters import ClusterScorer
+
+CLUSTER_TOBASE = 3
+BASE_POXIMITY_MULTIPLIER = 5
+
+
+class LegacyCluster:
+    """
+    the per-cluster object formerly built for every third cell: its center
+    cell and the 3x3 window around it, so the center is counted twice
+    """
+
+    def __init__(self, game_map, center_cell):
+        self.position = center_cell.position
+        self.center = center_cell
+        self.cluster = [center_cell]
+        self.halite_multiplier = 1
+        for dx in range(-1, 2):
+            for dy in range(-1, 2):
+                self.cluster.append(game_map[Position(
+                    self.position.x + dx, self.position.y + dy)])
+
+    @property
+    def halite_amount(self):
+        return (sum([cell.halite_amount
+                     for cell in self.cluster])) * self.halite_multiplier
+
+    def __lt__(self, other):
+        return self.halite_amount < other.halite_amount
+
+
+def legacy_richest_clusters(game_map, shipyard, top_n=5):
+    clusters = {}
+    for x in range(1, game_map.width, 3):
+        for y in range(1, game_map.height, 3):
+            clusters[Position(x, y)] = LegacyCluster(
+                game_map, game_map[Position(x, y)])
+    for position, cluster in clusters.items():
+        if game_map.distances.straight_distance(
+                position, shipyard) < game_map.width / CLUSTER_TOBASE:
+            cluster.halite_multiplier = BASE_POXIMITY_MULTIPLIER
+    return sorted(clusters.values(), reverse=True)[:top_n]
+
+
+def vectorized_richest_clusters(scorer, game_map, multiplier, top_n=5):
+    return scorer.top(game_map, multiplier, top_n)
+
+
+def check_agreement(legacy, vectorized):
+    """assert both pick the same clusters, once the legacy double-counted center is removed"""
+    legacy = {(cluster.position, cluster.halite_amount
+               - cluster.center.halite_amount * cluster.halite_multiplier)
+              for cluster in legacy}
+    vectorized = {(site.position, site.halite_amount) for site in vectorized}
+    assert legacy == vectorized, \
+        "legacy clusters {} differ from {}".format(legacy, vectorized)
+
+
+def best_of(function, *args, repeat=5):
+    """best mean seconds per call over a few rounds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(10):
+            function(*args)
+        best = min(best, (time.perf_counter() - start) / 10)
+    return best
+
+
+def main():
+    size = 64
+    rng = random.Random(0)
+    halite = [rng.randint(0, 1000) for _ in range(size * size)]
+    object_map = GameMap._from_halite(halite, size, size)
+    array_map = ArrayGameMap._from_halite(halite, size, size)
+    shipyard = Position(size // 4, size // 2)
+
+    scorer = ClusterScorer()
+    distances = array_map.distances.straight_from_point(shipyard)
+    multiplier = np.where(distances < size / CLUSTER_TOBASE,
+                          BASE_POXIMITY_MULTIPLIER, 1)
+
+    check_agreement(
+        legacy_richest_clusters(object_map, shipyard),
+        vectorized_richest_clusters(scorer, array_map, multiplier))
+
+    legacy = best_of(legacy_richest_clusters, object_map, shipyard)
+    vectorized = best_of(vectorized_richest_clusters, scorer, array_map,
+                         multiplier)
+    print("{0}x{0} map, per call:".format(size))
+    print("   Cluster objects: {:.2f}ms".format(legacy * 1e3))
+    print("     ClusterScorer: {:.2f}ms".format(vectorized * 1e3))
+    print("speedup: {:.1f}x".format(legacy / vectorized))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of Game.update_frame parse time per turn, replaying the
+same engine input through the line by line reader and the bulk FrameReader.
+
+Usage: python -m benchmarks.frame_parsing [recorded_input]
+Without a recording a synthetic late-game 4 player 64x64 stream is used.
+"""
+import io
+import statistics
+import sys
+import time
+
+import hlt
+from hlt.common import FrameReader
+
+from .streams import load_stream, quiet_logging, synthetic_stream
+
+
+def time_frames(stream, bulk):
+    """
+    Loads a game from the stream and times every update_frame call.
+    :param stream: Raw engine input as bytes
+    :param bulk: Whether to parse with FrameReader or line by line
+    :return: A list of seconds spent per turn
+    """
+    stdin = sys.stdin
+    if bulk:
+        reader = FrameReader(io.BytesIO(stream))
+    else:
+        reader = None
+        sys.stdin = io.TextIOWrapper(io.BytesIO(stream))
+    timings = []
+    try:
+        game = hlt.Game(reader=reader)
+        while True:
+            start = time.perf_counter()
+            game.update_frame()
+            timings.append(time.perf_counter() - start)
+    except SystemExit:
+        pass
+    finally:
+        sys.stdin = stdin
+    return timings
+
+
+def main():
+    quiet_logging()
+
+    if len(sys.argv) > 1:
+        stream = load_stream(sys.argv[1])
+    else:
+        stream = synthetic_stream(size=64, turns=200, num_players=4)
+
+    results = {}
+    for name, bulk in (("line reader", False), ("frame reader", True)):
+        timings = time_frames(stream, bulk)
+        results[name] = statistics.mean(timings)
+        print("{:>12}: {} turns, mean {:.0f}us, median {:.0f}us, max {:.0f}us".format(
+            name, len(timings), results[name] * 1e6,
+            statistics.median(timings) * 1e6, max(timings) * 1e6))
+    print("speedup: {:.2f}x".format(
+        results["line reader"] / results["frame reader"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Engine input streams for benchmarks: loading recorded ones (see the
+HALITE_RECORD variable in MyBot.py), rebuilding them from engine replays,
+and generating synthetic ones.
+"""
+import json
+import logging
+import random
+
+from hlt.constants import DEFAULT_CONSTANTS, max_turns
+
+
+def quiet_logging():
+    """Keep Game from opening a log file, and leave formatting out of it"""
+    logging.getLogger().addHandler(logging.NullHandler())
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def load_stream(path):
+    """
+    :param path: A file of raw engine input
+    :return: Its contents as bytes
+    """
+    with open(path, "rb") as recording:
+        return recording.read()
+
+
+def replay_stream(path, player_id=0):
+    """
+    Rebuilds the engine input a player received from a replay file. The
+    engine's .hlt replays are zstd compressed, which needs the zstandard
+    package; uncompressed replay JSON is read as is.
+    :param path: A replay file
+    :param player_id: The player whose input to rebuild
+    :return: The stream as bytes
+    """
+    with open(path, "rb") as replay_file:
+        data = replay_file.read()
+    if not data.lstrip().startswith(b"{"):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(
+                "reading compressed replays needs the zstandard package")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    replay = json.loads(data.decode())
+
+    players = sorted(replay["players"], key=lambda player: player["player_id"])
+    production = replay["production_map"]
+    lines = [json.dumps(replay["GAME_CONSTANTS"]),
+             "{} {}".format(len(players), player_id)]
+    for player in players:
+        lines.append("{} {} {}".format(player["player_id"],
+                                       player["factory_location"]["x"],
+                                       player["factory_location"]["y"]))
+    lines.append("{} {}".format(production["width"], production["height"]))
+    lines.extend(" ".join(str(cell["energy"]) for cell in row)
+                 for row in production["grid"])
+
+    dropoffs = {player["player_id"]: [] for player in players}
+    for turn, frame in enumerate(replay["full_frames"][:-1], 1):
+        lines.append(str(turn))
+        for player in players:
+            fleet = frame["entities"].get(str(player["player_id"]), {})
+            owned = dropoffs[player["player_id"]]
+            lines.append("{} {} {} {}".format(
+                player["player_id"], len(fleet), len(owned),
+                frame["energy"].get(str(player["player_id"]), 0)))
+            lines.extend("{} {} {} {}".format(
+                ship_id, ship["x"], ship["y"], ship["energy"])
+                for ship_id, ship in fleet.items())
+            lines.extend("{} {} {}".format(*dropoff) for dropoff in owned)
+        lines.append(str(len(frame["cells"])))
+        lines.extend("{} {} {}".format(cell["x"], cell["y"],
+                                       cell["production"])
+                     for cell in frame["cells"])
+        # dropoffs built this turn show up from the next frame on
+        for event in frame.get("events", []):
+            if event["type"] == "construct":
+                dropoffs[event["owner_id"]].append(
+                    (event["id"], event["location"]["x"],
+                     event["location"]["y"]))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def synthetic_stream(size=64, turns=100, num_players=4, max_ships=100,
+                     seed=0):
+    """
+    Generates a plausible engine input stream: ships spawn at the shipyards,
+    random walk while filling up, and a few dozen cells change every turn.
+    :param size: The map width and height
+    :param turns: The number of turns to generate
+    :param num_players: 2 or 4
+    :param max_ships: Fleet size each player grows to
+    :param seed: Random seed
+    :return: The stream as bytes
+    """
+    rng = random.Random(seed)
+    game_constants = dict(DEFAULT_CONSTANTS, MAX_TURNS=max_turns(size))
+    lines = [json.dumps(game_constants), "{} 0".format(num_players)]
+    shipyards = [(size // 4, size // 2), (3 * size // 4, size // 2),
+                 (size // 4, size // 4), (3 * size // 4, size // 4)]
+    shipyards = shipyards[:num_players]
+    for player, (x, y) in enumerate(shipyards):
+        lines.append("{} {} {}".format(player, x, y))
+    lines.append("{} {}".format(size, size))
+    halite = [[rng.randint(0, 900) for _ in range(size)] for _ in range(size)]
+    lines.extend(" ".join(map(str, row)) for row in halite)
+
+    ships = [{} for _ in shipyards]
+    next_id = 0
+    for turn in range(1, turns + 1):
+        lines.append(str(turn))
+        for player, fleet in enumerate(ships):
+            for ship in fleet.values():
+                dx, dy = rng.choice([(0, 1), (1, 0), (0, -1), (-1, 0), (0, 0)])
+                ship[0] = (ship[0] + dx) % size
+                ship[1] = (ship[1] + dy) % size
+                ship[2] = min(1000, ship[2] + rng.randint(0, 50))
+            if len(fleet) < max_ships:
+                x, y = shipyards[player]
+                fleet[next_id] = [x, y, 0]
+                next_id += 1
+            lines.append("{} {} 0 5000".format(player, len(fleet)))
+            lines.extend("{} {} {} {}".format(ship_id, *ship)
+                         for ship_id, ship in fleet.items())
+        changes = rng.randint(0, 3 * len(ships) * len(ships[0]) // 2)
+        lines.append(str(changes))
+        for _ in range(changes):
+            x, y = rng.randrange(size), rng.randrange(size)
+            halite[y][x] = max(0, halite[y][x] - rng.randint(0, 100))
+            lines.append("{} {} {}".format(x, y, halite[y][x]))
+    return ("\n".join(lines) + "\n").encode()
@@ -0,0 +1,183 @@
+"""
+Benchmark of the bot's whole turn: parsing the frame with update_frame and
+planning it with MyBot, replaying engine input without the engine.
+
+Reports p50/p99 turn latency and p50/p99 memory allocated per turn (the peak
+traced by tracemalloc, measured in a second pass) for the early, mid and
+late thirds of each game. Results can be saved as a baseline, and compared
+against one, failing with exit status 1 on regressions.
+
+Usage: python -m benchmarks.turns [--save BASELINE] [--baseline BASELINE]
+                                  [--tolerance 0.25] [input ...]
+Inputs are recorded engine input (.txt etc.) or replays from replays/ (.hlt).
+Without inputs synthetic 2 player 32x32 and 4 player 64x64 games are used.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import hlt
+from hlt.common import FrameReader
+
+import MyBot
+
+from .streams import (load_stream, quiet_logging, replay_stream,
+                      synthetic_stream)
+
+STAGES = ("early", "mid", "late")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines",
+                                "turns.json")
+# differences below these are noise however large relative to the baseline
+MIN_REGRESSION_MS = 0.5
+MIN_REGRESSION_KIB = 16
+
+
+def scenarios(inputs):
+    """{name: engine input stream} for the inputs, or synthetic games"""
+    if not inputs:
+        return {
+            "synthetic 32x32 2p": synthetic_stream(
+                size=32, turns=400, num_players=2, max_ships=30),
+            "synthetic 64x64 4p": synthetic_stream(
+                size=64, turns=500, num_players=4, max_ships=80),
+        }
+    return {
+        os.path.basename(path): replay_stream(path)
+        if path.endswith(".hlt") else load_stream(path)
+        for path in inputs
+    }
+
+
+def play(stream, trace_memory=False):
+    """
+    Plays the whole stream as player 0, measuring each turn.
+    :param stream: Raw engine input as bytes
+    :param trace_memory: Measure the memory allocated per turn instead of time
+    :return: A list of (ships, seconds or peak bytes allocated) per turn
+    """
+    random.seed(0)
+    game = hlt.Game(array_map=True, reader=FrameReader(io.BytesIO(stream)))
+    bot = MyBot.make_bot(game)
+    turns = []
+    while True:
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            game.update_frame()
+        except SystemExit:
+            break
+        bot(game)
+        elapsed = time.perf_counter() - start
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            turns.append((len(game.me.get_ships()), peak))
+        else:
+            turns.append((len(game.me.get_ships()), elapsed))
+    if trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return turns
+
+
+def percentile(values, fraction):
+    """nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(stream):
+    """{stage: summary} of the latency and allocations of each third of the game"""
+    timings = play(stream)
+    allocations = play(stream, trace_memory=True)
+    results = {}
+    third = -(-len(timings) // 3)
+    for number, stage in enumerate(STAGES):
+        stage_turns = slice(number * third, (number + 1) * third)
+        ships = [ships for ships, _ in timings[stage_turns]]
+        seconds = [seconds for _, seconds in timings[stage_turns]]
+        peaks = [peak for _, peak in allocations[stage_turns]]
+        if not seconds:
+            continue
+        results[stage] = {
+            "turns": len(seconds),
+            "ships": round(sum(ships) / len(ships)),
+            "p50_ms": percentile(seconds, 0.5) * 1e3,
+            "p99_ms": percentile(seconds, 0.99) * 1e3,
+            "p50_kib": percentile(peaks, 0.5) / 1024,
+            "p99_kib": percentile(peaks, 0.99) / 1024,
+        }
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """descriptions of every measurement worse than the baseline by more than tolerance"""
+    found = []
+    for name, stages in results.items():
+        for stage, summary in stages.items():
+            before = baseline.get(name, {}).get(stage)
+            if before is None:
+                continue
+            for key, minimum in (("p50_ms", MIN_REGRESSION_MS),
+                                 ("p99_ms", MIN_REGRESSION_MS),
+                                 ("p50_kib", MIN_REGRESSION_KIB),
+                                 ("p99_kib", MIN_REGRESSION_KIB)):
+                if summary[key] > before[key] * (1 + tolerance) and \
+                        summary[key] - before[key] > minimum:
+                    found.append("{} {} {}: {:.1f} -> {:.1f}".format(
+                        name, stage, key, before[key], summary[key]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("inputs", nargs="*")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE,
+                        help="save the results as a baseline")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help="fail if results regressed from this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline")
+    args = parser.parse_args()
+    if args.baseline and args.baseline != args.save and \
+            not os.path.exists(args.baseline):
+        sys.exit("no baseline at {}, save one with --save first".format(
+            args.baseline))
+
+    quiet_logging()
+
+    results = {}
+    for name, stream in scenarios(args.inputs).items():
+        results[name] = measure(stream)
+        print(name)
+        for stage, summary in results[name].items():
+            print("  {:>5}: {turns:3} turns, ~{ships:3} ships, "
+                  "p50 {p50_ms:6.2f}ms, p99 {p99_ms:6.2f}ms, "
+                  "alloc p50 {p50_kib:7.1f}KiB, p99 {p99_kib:7.1f}KiB".format(
+                      stage, **summary))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)),
+                    exist_ok=True)
+        with open(args.save, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print("saved baseline to {}".format(args.save))
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            found = regressions(results, json.load(baseline_file),
+                                args.tolerance)
+        for regression in found:
+            print("REGRESSION " + regression)
+        if found:
+            sys.exit(1)
+        print("no regressions against {}".format(args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from hlt.logs import SUMMARY_LOGGER
+
+# the engine kills bots that take longer than this to answer a turn
+TURN_TIME_LIMIT = 2.0
+# time kept back for resolving moves and sending commands
+RESERVE_TIME = 0.3
+
+
+class TurnBudget:
+    """
+    Keeps track of how much of the engine's per-turn time limit has been
+    used, and by which phase of the turn.
+
+    Call start() with the time the frame arrived, so parsing it counts
+    against the limit too; planning should check exhausted() and fall back
+    to cheap defaults once it returns True.
+    """
+
+    def __init__(self, limit=TURN_TIME_LIMIT, reserve=RESERVE_TIME):
+        self.limit = limit
+        self.reserve = reserve
+        self.start()
+
+    def start(self, at=None):
+        """start timing a new turn from a perf_counter time, by default now"""
+        self._start = time.perf_counter() if at is None else at
+        self.phases = {}  # {phase name: seconds}
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    @property
+    def remaining(self):
+        return self.limit - self.elapsed
+
+    def exhausted(self):
+        """whether only the reserve is left"""
+        return self.remaining <= self.reserve
+
+    @contextmanager
+    def phase(self, name):
+        """time a block of the turn under this phase name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + \
+                time.perf_counter() - start
+
+    def report(self, **counts):
+        """log the time each phase took, with any extra counts"""
+        logger = logging.getLogger(SUMMARY_LOGGER)
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        phases = ", ".join(f"{name} {seconds * 1000:.0f}ms"
+                           for name, seconds in self.phases.items())
+        extra = "".join(f", {name} {count}" for name, count in counts.items())
+        logger.info(
+            f"turn budget: {phases}, total {self.elapsed * 1000:.0f}ms "
+            f"of {self.limit * 1000:.0f}ms{extra}")
@@ -0,0 +1,188 @@
+import heapq
+from collections import namedtuple
+
+import numpy as np
+
+# a scored cluster: its center position and its (weighted) halite
+ClusterSite = namedtuple("ClusterSite", ["position", "halite_amount"])
+
+
+def window_sums(halite, size=3):
+    """
+    Sum of every size x size window of a toroidal grid, centered on each cell.
+    size should be odd.
+    """
+    radius = size // 2
+    halite = halite.astype(np.int64, copy=False)
+    rows = sum(np.roll(halite, shift, axis=1)
+               for shift in range(-radius, radius + 1))
+    return sum(np.roll(rows, shift, axis=0)
+               for shift in range(-radius, radius + 1))
+
+
+def diamond_sums(grid, radius):
+    """
+    Sum of every cell of a toroidal grid within Manhattan distance radius,
+    centered on each cell.
+    """
+    grid = grid.astype(np.int64, copy=False)
+    # rows[reach]: sums of the 2 * reach + 1 cells centered on each cell of its row
+    rows = [grid]
+    for reach in range(1, radius + 1):
+        rows.append(rows[-1] + np.roll(grid, reach, axis=1)
+                    + np.roll(grid, -reach, axis=1))
+    sums = rows[radius].copy()
+    for dy in range(1, radius + 1):
+        row = rows[radius - dy]
+        sums += np.roll(row, dy, axis=0) + np.roll(row, -dy, axis=0)
+    return sums
+
+
+class ClusterScorer:
+    """
+    Scores k x k clusters of cells over the whole halite grid in one pass.
+
+    Only cluster centers on a lattice of every `stride` cells (starting at
+    `offset`) are candidates, so the clusters returned don't overlap.
+    """
+
+    def __init__(self, size=3, stride=3, offset=1):
+        self.size = size
+        self.stride = stride
+        self.offset = offset
+        self._centers = {}  # {map shape: flat indices of candidate centers}
+
+    def centers(self, shape):
+        """flat indices of the candidate cluster centers on a map of this shape"""
+        if shape not in self._centers:
+            height, width = shape
+            ys = np.arange(self.offset % self.stride, height, self.stride)
+            xs = np.arange(self.offset % self.stride, width, self.stride)
+            self._centers[shape] = (ys[:, None] * width + xs).ravel()
+        return self._centers[shape]
+
+    def scores(self, halite, multiplier=None):
+        """cluster halite centered on every cell, weighted by an optional multiplier grid"""
+        sums = window_sums(halite, self.size)
+        if multiplier is not None:
+            sums = sums * multiplier
+        return sums
+
+    def top(self, game_map, multiplier=None, top_n=5):
+        """
+        returns the top_n richest clusters on the map as ClusterSites,
+        richest first
+        """
+        scores = self.scores(game_map.halite, multiplier)
+        return self.select(game_map, scores.ravel()[self.centers(scores.shape)],
+                           self.centers(scores.shape), top_n)
+
+    @staticmethod
+    def select(game_map, values, indices, top_n):
+        """
+        partially selects the top_n values (without sorting the rest) and
+        returns them as ClusterSites at the matching flat indices
+        """
+        if top_n < len(values):
+            best = np.argpartition(-values, top_n - 1)[:top_n]
+        else:
+            best = np.arange(len(values))
+        best = best[np.argsort(-values[best], kind="stable")]
+        return [
+            ClusterSite(game_map.position_of(int(indices[i])), values[i].item())
+            for i in best
+        ]
+
+
+class HaliteStats:
+    """
+    Total halite, cluster sums and the richest clusters of an ArrayGameMap,
+    kept up to date from the cells that changed each turn (the map's
+    dirty_cells) rather than by rescanning the map.
+
+    The richest clusters come from a heap of candidate centers. Entries go
+    stale when a cluster changes and are skipped lazily; rebuild does a full
+    rescan and is only needed on demand.
+    """
+
+    def __init__(self, game_map, scorer=None, multiplier=None):
+        self.scorer = scorer or ClusterScorer()
+        self.multiplier = multiplier
+        self.rebuild(game_map)
+
+    def rebuild(self, game_map):
+        """recomputes everything from a full scan of the map"""
+        self.halite = game_map.halite.astype(np.int64)
+        self.total_halite = int(self.halite.sum())
+        self.cell_count = self.halite.size
+        self.sums = window_sums(self.halite, self.scorer.size)
+        self._centers = self.scorer.centers(self.halite.shape)
+        self._is_center = np.zeros(self.halite.size, dtype=bool)
+        self._is_center[self._centers] = True
+        self._rebuild_heap()
+
+    def set_multiplier(self, multiplier):
+        """changes the grid weighting cluster scores, e.g. when a base is added"""
+        self.multiplier = multiplier
+        self._rebuild_heap()
+
+    def _score(self, indices):
+        scores = self.sums.ravel()[indices]
+        if self.multiplier is not None:
+            scores = scores * self.multiplier.ravel()[indices]
+        return scores
+
+    def _rebuild_heap(self):
+        self._heap = [(-score, index) for score, index in zip(
+            self._score(self._centers).tolist(), self._centers.tolist())]
+        heapq.heapify(self._heap)
+
+    def update(self, game_map):
+        """applies the halite changes of the last map update"""
+        if not game_map.dirty_cells:
+            return
+        height, width = self.halite.shape
+        xs = np.fromiter((p.x for p in game_map.dirty_cells), dtype=np.intp)
+        ys = np.fromiter((p.y for p in game_map.dirty_cells), dtype=np.intp)
+        deltas = game_map.halite[ys, xs] - self.halite[ys, xs]
+        self.halite[ys, xs] += deltas
+        self.total_halite += int(deltas.sum())
+
+        # every window containing a changed cell gets its delta
+        radius = self.scorer.size // 2
+        offsets = np.arange(-radius, radius + 1)
+        window_ys = (ys[:, None, None] + offsets[None, :, None]) % height
+        window_xs = (xs[:, None, None] + offsets[None, None, :]) % width
+        indices = (window_ys * width + window_xs).ravel()
+        np.add.at(self.sums.ravel(), indices,
+                  np.repeat(deltas, len(offsets)**2))
+
+        changed = np.unique(indices)
+        changed = changed[self._is_center[changed]]
+        for score, index in zip(self._score(changed).tolist(),
+                                changed.tolist()):
+            heapq.heappush(self._heap, (-score, index))
+        if len(self._heap) > 4 * len(self._centers):
+            self._rebuild_heap()
+
+    @property
+    def halite_per_cell(self):
+        return round(self.total_halite / self.cell_count)
+
+    def top_clusters(self, game_map, top_n=5):
+        """the top_n richest clusters as ClusterSites, richest first"""
+        best = []
+        seen = set()
+        while self._heap and len(best) < top_n:
+            negative_score, index = heapq.heappop(self._heap)
+            # stale entries are dropped, duplicates of a current one skipped
+            if index not in seen and \
+                    self._score(index).item() == -negative_score:
+                best.append((negative_score, index))
+                seen.add(index)
+        for entry in best:
+            heapq.heappush(self._heap, entry)
+        return [
+            ClusterSite(game_map.position_of(index), -negative_score)
+            for negative_score, index in best
+        ]
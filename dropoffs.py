@@ -0,0 +1,96 @@
+import numpy as np
+
+from hlt import constants
+
+from clusters import diamond_sums
+
+# cells within this distance of a site count as the area it would serve
+DENSITY_RADIUS = 4
+# share of an area's halite expected to be mined and carried to its dropoff
+MINED_FRACTION = 0.5
+# cargo a ship brings back per trip, as a fraction of MAX_HALITE
+TRIP_CARGO = 0.9
+# our ships within this distance of a site count as the ones that would use it
+FLEET_RADIUS = 8
+# no site closer than this to one of our bases, or farther than this
+# fraction of the map's size: ships wouldn't mine that far out anyway
+MIN_BASE_DISTANCE = 8
+MAX_BASE_DISTANCE = 0.3
+
+
+class DropoffPlanner:
+    """
+    Scores every cell as a dropoff site at once and picks the best one, if
+    building there pays for itself, counting both in ship turns.
+    """
+
+    def __init__(self, game_map, bases):
+        self.distances = game_map.distances
+        self.max_distance = MAX_BASE_DISTANCE * min(game_map.width,
+                                                    game_map.height)
+        self.base_distance = None  # grid, distance to our nearest base
+        for base in bases:
+            self.add_base(base.position)
+
+    def add_base(self, position):
+        """count a new base of ours in the distances to the nearest base"""
+        distance = self.distances.from_point(position)
+        if self.base_distance is None:
+            self.base_distance = distance
+        else:
+            np.minimum(self.base_distance, distance, out=self.base_distance)
+
+    def trips(self, game, game_map):
+        """
+        grids of the trips home the halite around each cell would take, and
+        of the turns each of them takes
+        """
+        area = diamond_sums(game_map.halite, DENSITY_RADIUS)
+        cells = 2 * DENSITY_RADIUS * (DENSITY_RADIUS + 1) + 1
+        cargo = constants.MAX_HALITE * TRIP_CARGO
+        fleet = diamond_sums(game_map.ship_owner == game.my_id, FLEET_RADIUS)
+        turns_left = constants.MAX_TURNS - game.turn_number
+        # a trip is the way there and back plus filling up
+        fill_turns = cargo * cells * constants.EXTRACT_RATIO / \
+            np.maximum(area, 1)
+        trip_turns = 2 * self.base_distance + fill_turns
+        trips = np.minimum(area * MINED_FRACTION / cargo,
+                           fleet * turns_left / trip_turns)
+        return trips, trip_turns
+
+    def net_values(self, game, game_map, spawning=True):
+        """
+        grid of the ship turns a dropoff on each cell would save net of its
+        cost, -inf where none may be built
+        :param spawning: Whether halite not spent would still buy ships
+        """
+        trips, trip_turns = self.trips(game, game_map)
+        saved = trips * 2 * self.base_distance
+        turns_left = constants.MAX_TURNS - game.turn_number
+        # the cell's halite is credited towards the cost
+        halite_cost = constants.DROPOFF_COST - game_map.halite
+        if spawning:
+            cost = (1 + halite_cost / constants.SHIP_COST) * turns_left
+        else:
+            # what a ship mining there would take that long to bring home
+            cost = turns_left + halite_cost * trip_turns / \
+                (constants.MAX_HALITE * TRIP_CARGO)
+        net = saved - cost
+        excluded = (self.base_distance < MIN_BASE_DISTANCE) | \
+            (self.base_distance > self.max_distance) | \
+            (game_map.structure_owner >= 0)
+        net[excluded] = -np.inf
+        return net
+
+    def best_site(self, game, game_map, spawning=True):
+        """(position, net value) of the most valuable site, None if none is worth building"""
+        net = self.net_values(game, game_map, spawning)
+        cell = int(net.argmax())
+        if net.flat[cell] <= 0:
+            return None
+        return game_map.position_of(cell), net.flat[cell].item()
+
+    def site_value(self, game, game_map, position, spawning=True):
+        """net value of a dropoff at a position"""
+        return self.net_values(game, game_map, spawning)[
+            position.y, position.x].item()
@@ -0,0 +1,181 @@
+import heapq
+
+from hlt import constants
+
+INFINITE_COST = float("inf")
+
+
+def shortest_paths(sources, leave_cost, neighbour_indices, fewest_steps=False):
+    """
+    Multi-source Dijkstra over the toroidal map graph, towards the sources.
+
+    Moving from a cell costs leave_cost of that cell; ties on cost are broken
+    by the number of steps.
+    :param sources: flat indices of the cells paths lead to
+    :param leave_cost: flat list of the cost of moving off each cell
+    :param neighbour_indices: per cell, the flat indices of its neighbours
+    :param fewest_steps: rank paths by their number of steps first and only
+        break ties on cost
+    :return: flat lists of each cell's path cost, path length, next cell on
+        the path and the source it leads to
+    """
+    size = len(leave_cost)
+    costs = [INFINITE_COST] * size
+    steps = [0] * size
+    next_cell = list(range(size))
+    origin = [-1] * size
+    heap = []
+    for source in sources:
+        costs[source] = 0
+        origin[source] = source
+        heap.append((0, 0, source))
+    heapq.heapify(heap)
+
+    while heap:
+        first, second, cell = heapq.heappop(heap)
+        cost, step = (second, first) if fewest_steps else (first, second)
+        if cost != costs[cell] or step != steps[cell]:
+            continue
+        step += 1
+        for neighbour in neighbour_indices[cell]:
+            neighbour_cost = cost + leave_cost[neighbour]
+            if fewest_steps:
+                better = costs[neighbour] == INFINITE_COST or (
+                    step, neighbour_cost) < (steps[neighbour], costs[neighbour])
+            else:
+                better = neighbour_cost < costs[neighbour] or (
+                    neighbour_cost == costs[neighbour]
+                    and step < steps[neighbour])
+            if better:
+                costs[neighbour] = neighbour_cost
+                steps[neighbour] = step
+                next_cell[neighbour] = cell
+                origin[neighbour] = origin[cell]
+                heapq.heappush(heap, (step, neighbour_cost, neighbour)
+                               if fewest_steps else
+                               (neighbour_cost, step, neighbour))
+    return costs, steps, next_cell, origin
+
+
+def move_costs(game_map):
+    """flat list of the halite it costs to move off each cell"""
+    return (game_map.halite // constants.MOVE_COST_RATIO).ravel().tolist()
+
+
+class ReturnField:
+    """
+    Quickest way home from every cell, recomputed once per turn with a single
+    multi-source shortest path pass from all shipyards and dropoffs.
+
+    Paths take the fewest moves, and among those burn the least halite, so
+    ships can look up their nearest base, how many moves and how much halite
+    getting there costs and their next step. Ranking by halite alone would
+    send ships on long detours over empty cells.
+    """
+
+    def __init__(self, game_map, bases):
+        self.update(game_map, bases)
+
+    def update(self, game_map, bases):
+        """recompute the field for this turn's halite and bases"""
+        self.game_map = game_map
+        sources = [game_map.index_of(base.position) for base in bases]
+        self.costs, self.steps, self.next_cell, self.origin = shortest_paths(
+            sources, move_costs(game_map), game_map.positions.neighbour_indices,
+            fewest_steps=True)
+
+    def cost(self, position):
+        """halite burnt on the path home"""
+        return self.costs[self.game_map.index_of(position)]
+
+    def distance(self, position):
+        """number of moves home, to the nearest base"""
+        return self.steps[self.game_map.index_of(position)]
+
+    def nearest_base(self, position):
+        """position of the base the path home leads to"""
+        return self.game_map.position_of(
+            self.origin[self.game_map.index_of(position)])
+
+    def next_step(self, position):
+        """next position on the path home (the position itself on a base)"""
+        return self.game_map.position_of(
+            self.next_cell[self.game_map.index_of(position)])
+
+    def direction(self, position):
+        """direction of the next step on the path home"""
+        return self.game_map.get_direction(position, self.next_step(position))
+
+
+class FlowFields:
+    """
+    Shared per-turn navigation fields towards destinations, e.g. the
+    clusters many ships head for. The first ship bound for a destination
+    computes its field with one shortest path pass from it; every other ship
+    bound there then reads its next step from the field.
+
+    Paths cost the halite burnt moving along them plus step_cost per move,
+    which keeps them from long detours over cheap cells, and congestion_cost
+    for every ship (of those passed to update) on a cell left. At most
+    max_fields fields are computed per turn, after which field returns None
+    and callers fall back to cheaper navigation.
+    """
+
+    def __init__(self, game_map, step_cost=0, congestion_cost=0,
+                 max_fields=8):
+        self.step_cost = step_cost
+        self.congestion_cost = congestion_cost
+        self.max_fields = max_fields
+        self.update(game_map)
+
+    def update(self, game_map, ships=()):
+        """forget last turn's fields and weigh paths by this turn's halite and ships"""
+        self.game_map = game_map
+        self.leave_cost = move_costs(game_map)
+        if self.step_cost:
+            self.leave_cost = [cost + self.step_cost
+                               for cost in self.leave_cost]
+        if self.congestion_cost:
+            for ship in ships:
+                self.leave_cost[game_map.index_of(ship.position)] += \
+                    self.congestion_cost
+        self._fields = {}  # {destination cell: (costs, steps, next_cell)}
+
+    def field(self, destination):
+        """the (costs, steps, next_cell) field towards a position, None if over the limit"""
+        cell = self.game_map.index_of(destination)
+        field = self._fields.get(cell)
+        if field is None:
+            if len(self._fields) >= self.max_fields:
+                return None
+            costs, steps, next_cell, _ = shortest_paths(
+                [cell], self.leave_cost,
+                self.game_map.positions.neighbour_indices)
+            field = self._fields[cell] = (costs, steps, next_cell)
+        return field
+
+    def next_step(self, position, destination):
+        """next position on the cheapest path to destination, None if over the limit"""
+        field = self.field(destination)
+        if field is None:
+            return None
+        return self.game_map.position_of(
+            field[2][self.game_map.index_of(position)])
+
+    def closer_steps(self, position, destination):
+        """
+        Neighbouring positions closer to destination along its field, i.e.
+        with a cheaper (or as cheap but shorter) path from them, best first.
+        None if over the limit.
+        """
+        field = self.field(destination)
+        if field is None:
+            return None
+        costs, steps, _ = field
+        cell = self.game_map.index_of(position)
+        closer = sorted(
+            (costs[neighbour], steps[neighbour], neighbour)
+            for neighbour in self.game_map.positions.neighbour_indices[cell]
+            if (costs[neighbour], steps[neighbour]) < (costs[cell], steps[cell]))
+        return [self.game_map.position_of(neighbour)
+                for _, _, neighbour in closer]
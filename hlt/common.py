@@ -1,3 +1,9 @@
+import sys
+import time
+
+from . import logs
+
+
 # Placed here to avoid circular imports
 def read_input():
     """
@@ -7,5 +13,131 @@ def read_input():
     try:
         return input()
     except EOFError as eof:
-        logging.shutdown()
+        logs.shutdown()
         raise SystemExit(eof)
+
+
+class LineReader:
+    """
+    Reads engine input one line at a time through read_input.
+
+    This is the starter kit's way of reading input, exposed through the same
+    interface as FrameReader so the game can be loaded with either.
+    """
+
+    def __init__(self):
+        # perf_counter time the last line of input was read
+        self.received = time.perf_counter()
+
+    def readline(self):
+        """
+        :return: The next line of input
+        """
+        return read_input()
+
+    def read_int(self):
+        """
+        :return: The next integer of input
+        """
+        return self.read_ints(1)[0]
+
+    def read_ints(self, count):
+        """
+        Reads lines until count integers have been collected.
+        :param count: The number of integers to read
+        :return: A list of the integers read
+        """
+        ints = []
+        while len(ints) < count:
+            line = read_input()
+            self.received = time.perf_counter()
+            ints.extend(map(int, line.split()))
+        return ints
+
+
+class FrameReader:
+    """
+    Buffered reader pulling engine input straight from the binary stdin.
+
+    Each read takes everything the engine has written so far (a whole turn at
+    once, as the engine sends a full frame before waiting on us) and parses
+    all complete integers in it in bulk.
+
+    readline is only meant for the constants line at the very start of the
+    game, before any integers have been read.
+    """
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, stream=None, record=None):
+        """
+        :param stream: A binary stream to read from, defaults to stdin
+        :param record: Optional path to copy all raw input to, e.g. to replay it in benchmarks
+        """
+        self._stream = sys.stdin.buffer if stream is None else stream
+        self._record = open(record, "wb") if record else None
+        self._buffer = b""
+        self._ints = []
+        self._pos = 0
+        # perf_counter time the last chunk of input arrived
+        self.received = time.perf_counter()
+
+    def _read_chunk(self):
+        """
+        Reads whatever input is available, shutting down logging and exiting on EOF
+        :return: The bytes read
+        """
+        chunk = self._stream.read1(self.CHUNK_SIZE)
+        self.received = time.perf_counter()
+        if not chunk:
+            logs.shutdown()
+            raise SystemExit("EOF when reading a frame")
+        if self._record:
+            self._record.write(chunk)
+            self._record.flush()
+        return chunk
+
+    def _fill(self):
+        """
+        Parses every complete integer already buffered, or reads a chunk
+        first if there are none, keeping any trailing partial token for the
+        next read.
+        """
+        data = self._buffer
+        cut = max(data.rfind(b" "), data.rfind(b"\n")) + 1
+        while not data[:cut].strip():
+            data += self._read_chunk()
+            cut = max(data.rfind(b" "), data.rfind(b"\n")) + 1
+        self._buffer = data[cut:]
+        if self._pos:
+            del self._ints[:self._pos]
+            self._pos = 0
+        self._ints.extend(map(int, data[:cut].split()))
+
+    def readline(self):
+        """
+        :return: The next line of input, without its line ending
+        """
+        while b"\n" not in self._buffer:
+            self._buffer += self._read_chunk()
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line.decode().rstrip("\r")
+
+    def read_int(self):
+        """
+        :return: The next integer of input
+        """
+        if self._pos >= len(self._ints):
+            self._fill()
+        self._pos += 1
+        return self._ints[self._pos - 1]
+
+    def read_ints(self, count):
+        """
+        :param count: The number of integers to read
+        :return: A list of the next count integers of input
+        """
+        while len(self._ints) - self._pos < count:
+            self._fill()
+        start = self._pos
+        self._pos += count
+        return self._ints[start:self._pos]
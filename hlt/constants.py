@@ -4,6 +4,29 @@ They come from game engine and changing them has no effect.
 They are strictly informational.
 """
 
+# The engine's defaults, for games played without it (simulator, benchmarks)
+DEFAULT_CONSTANTS = {
+    "NEW_ENTITY_ENERGY_COST": 1000,
+    "DROPOFF_COST": 4000,
+    "MAX_ENERGY": 1000,
+    "MAX_TURNS": 400,
+    "EXTRACT_RATIO": 4,
+    "MOVE_COST_RATIO": 10,
+    "INSPIRATION_ENABLED": True,
+    "INSPIRATION_RADIUS": 4,
+    "INSPIRATION_SHIP_COUNT": 2,
+    "INSPIRED_EXTRACT_RATIO": 4,
+    "INSPIRED_BONUS_MULTIPLIER": 2.0,
+    "INSPIRED_MOVE_COST_RATIO": 10,
+}
+
+
+def max_turns(size):
+    """
+    The engine's game length for a map size: 400 turns on 32x32 up to 500 on 64x64.
+    """
+    return 400 + 100 * (size - 32) // 32
+
 
 def load_constants(constants):
     """
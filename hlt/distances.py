@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class DistanceTable:
+    """
+    Toroidal distances for a width x height map, from precomputed 1-D
+    wrap-around distance tables.
+
+    There is one table per map size, shared through for_size. Besides single
+    lookups it answers whole-map and many-to-many queries as numpy arrays.
+    """
+    _tables = {}
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # Wrapped distance along each axis, indexed by the coordinate
+        # difference modulo the map size
+        self._x_wrap = [min(d, width - d) for d in range(width)]
+        self._y_wrap = [min(d, height - d) for d in range(height)]
+        xs = np.arange(width)
+        ys = np.arange(height)
+        # x_table[a, b] (and y_table) is the wrapped distance between
+        # coordinates a and b
+        self.x_table = np.array(self._x_wrap)[(xs[:, None] - xs) % width]
+        self.y_table = np.array(self._y_wrap)[(ys[:, None] - ys) % height]
+
+    @classmethod
+    def for_size(cls, width, height):
+        """
+        :return: The shared table for a map size
+        """
+        if (width, height) not in cls._tables:
+            cls._tables[width, height] = DistanceTable(width, height)
+        return cls._tables[width, height]
+
+    def distance(self, source, target):
+        """
+        :return: The Manhattan distance between two positions, accounting for wrap-around
+        """
+        return self._x_wrap[(source.x - target.x) % self.width] + \
+            self._y_wrap[(source.y - target.y) % self.height]
+
+    def straight_distance(self, source, target):
+        """
+        :return: The Euclidean distance between two positions, accounting for wrap-around
+        """
+        return (self._x_wrap[(source.x - target.x) % self.width]**2 +
+                self._y_wrap[(source.y - target.y) % self.height]**2)**0.5
+
+    def from_point(self, position):
+        """
+        :param position: The source position
+        :return: A height x width array of the Manhattan distance from position to every cell
+        """
+        return self.y_table[position.y % self.height][:, None] + \
+            self.x_table[position.x % self.width][None, :]
+
+    def straight_from_point(self, position):
+        """
+        :param position: The source position
+        :return: A height x width array of the Euclidean distance from position to every cell
+        """
+        return np.sqrt(self.y_table[position.y % self.height][:, None]**2 +
+                       self.x_table[position.x % self.width][None, :]**2)
+
+    def pairwise(self, sources, targets):
+        """
+        :param sources: N positions, e.g. ship positions
+        :param targets: M positions, e.g. base positions
+        :return: An N x M array of the Manhattan distance between every source and target
+        """
+        source_x, source_y = _coordinates(sources, self.width, self.height)
+        target_x, target_y = _coordinates(targets, self.width, self.height)
+        return self.x_table[source_x[:, None], target_x[None, :]] + \
+            self.y_table[source_y[:, None], target_y[None, :]]
+
+
+def _coordinates(positions, width, height):
+    """
+    :return: Arrays of the normalized x and y coordinates of some positions
+    """
+    xs = np.fromiter((position.x for position in positions), dtype=np.intp)
+    ys = np.fromiter((position.y for position in positions), dtype=np.intp)
+    return xs % width, ys % height
@@ -1,7 +1,7 @@
 import abc
 
 from . import commands, constants
-from .positionals import Direction, Position
+from .positionals import Direction, interned
 from .common import read_input
 
 
@@ -22,7 +22,7 @@ class Entity(abc.ABC):
         :return: An instance of Entity along with its id
         """
         ship_id, x_position, y_position = map(int, read_input().split())
-        return ship_id, Entity(player_id, ship_id, Position(x_position, y_position))
+        return ship_id, Entity(player_id, ship_id, interned(x_position, y_position))
 
     def __repr__(self):
         return "{}(id={}, {})".format(self.__class__.__name__,
@@ -87,7 +87,7 @@ class Ship(Entity):
         :return: The ship id and ship object
         """
         ship_id, x_position, y_position, halite = map(int, read_input().split())
-        return ship_id, Ship(player_id, ship_id, Position(x_position, y_position), halite)
+        return ship_id, Ship(player_id, ship_id, interned(x_position, y_position), halite)
 
     def __repr__(self):
         return "{}(id={}, {}, cargo={} halite)".format(self.__class__.__name__,
@@ -1,9 +1,13 @@
 import queue
 import random
+
+import numpy as np
+
 from . import constants
 from .entity import Entity, Shipyard, Ship, Dropoff
-from .positionals import Direction, Position
+from .positionals import Direction, Position, PositionTable, interned
 from .common import read_input
+from .distances import DistanceTable
 import logging
 
 
@@ -67,7 +71,7 @@ class Player:
         """
         player, shipyard_x, shipyard_y = map(int, read_input().split())
         return Player(player,
-                      Shipyard(player, -1, Position(shipyard_x, shipyard_y)))
+                      Shipyard(player, -1, interned(shipyard_x, shipyard_y)))
 
     def _update(self, num_ships, num_dropoffs, halite):
         """
@@ -89,15 +93,34 @@ class Player:
             [Dropoff._generate(self.id) for _ in range(num_dropoffs)]
         }
 
+    def _load(self, halite, ship_ints, dropoff_ints):
+        """
+        Updates this player object from integers already parsed from the engine's input.
+        :param halite: How much halite the player has in total
+        :param ship_ints: Flat list of id, x, y, halite for each ship
+        :param dropoff_ints: Flat list of id, x, y for each dropoff
+        :return: nothing.
+        """
+        self.halite_amount = halite
+        fields = iter(ship_ints)
+        self._ships = {
+            ship_id: Ship(self.id, ship_id, interned(x, y), cargo)
+            for ship_id, x, y, cargo in zip(fields, fields, fields, fields)
+        }
+        fields = iter(dropoff_ints)
+        self._dropoffs = {
+            dropoff_id: Dropoff(self.id, dropoff_id, interned(x, y))
+            for dropoff_id, x, y in zip(fields, fields, fields)
+        }
 
-class MapCell:
-    """A cell on the game map."""
 
-    def __init__(self, position, halite_amount):
-        self.position = position
-        self.halite_amount = halite_amount
-        self.ship = None
-        self.structure = None
+class BaseCell:
+    """
+    Behaviour shared by MapCell and CellView, built on the position,
+    halite_amount, ship and structure they provide. It has no instance
+    dict, so CellView's slots take effect.
+    """
+    __slots__ = ()
 
     @property
     def is_empty(self):
@@ -152,6 +175,32 @@ class MapCell:
                                                self.halite_amount)
 
 
+class MapCell(BaseCell):
+    """A cell on the game map."""
+
+    def __init__(self, position, halite_amount, occupied=None):
+        """
+        :param position: The position of this cell
+        :param halite_amount: The halite in this cell
+        :param occupied: Optional list shared with the map, which this cell appends itself to whenever a ship is set
+        """
+        self.position = position
+        self.halite_amount = halite_amount
+        self._occupied = occupied
+        self._ship = None
+        self.structure = None
+
+    @property
+    def ship(self):
+        return self._ship
+
+    @ship.setter
+    def ship(self, ship):
+        self._ship = ship
+        if ship is not None and self._occupied is not None:
+            self._occupied.append(self)
+
+
 class GameMap:
     """
     The game map.
@@ -163,7 +212,16 @@ class GameMap:
     def __init__(self, cells, width, height):
         self.width = width
         self.height = height
+        self.positions = PositionTable.for_size(width, height)
+        self.distances = DistanceTable.for_size(width, height)
         self._cells = cells
+        # Cells marked with a ship since the last update, so only those need
+        # clearing, and the positions whose halite changed in the last update
+        self._occupied = []
+        self.dirty_cells = set()
+        for row in cells:
+            for cell in row:
+                cell._occupied = self._occupied
 
     def __getitem__(self, location):
         """
@@ -186,6 +244,12 @@ class GameMap:
                 __cells.append(cell)
         return iter(__cells)
 
+    def total_halite(self):
+        """
+        :return: The total amount of halite left on the map
+        """
+        return sum(cell.halite_amount for cell in self)
+
     def calculate_distance(self, source, target):
         """
         Compute the Manhattan distance between two locations.
@@ -194,11 +258,7 @@ class GameMap:
         :param target: The target to where calculate
         :return: The distance between these items
         """
-        source = self.normalize(source)
-        target = self.normalize(target)
-        resulting_position = abs(source - target)
-        return min(resulting_position.x, self.width - resulting_position.x) + \
-            min(resulting_position.y, self.height - resulting_position.y)
+        return self.distances.distance(source, target)
 
     def normalize(self, position):
         """
@@ -209,7 +269,7 @@ class GameMap:
         :param position: A position object.
         :return: A normalized position object fitting within the bounds of the map
         """
-        return Position(position.x % self.width, position.y % self.height)
+        return self.positions.get(position.x, position.y)
 
     @staticmethod
     def _get_target_direction(source, target):
@@ -225,6 +285,17 @@ class GameMap:
                 if target.x > source.x else Direction.West
                 if target.x < source.x else None)
 
+    def get_direction(self, source, target):
+        """
+        Returns the Direction that moves source onto target, which must be the same or an adjacent cell.
+        Accounts for wrap-around.
+        :param source: The source position
+        :param target: The same or an adjacent position
+        :return: The Direction tuple
+        """
+        return ((target.x - source.x + 1) % self.width - 1,
+                (target.y - source.y + 1) % self.height - 1)
+
     def get_unsafe_moves(self, source, destination):
         """
         Return the Direction(s) to move closer to the target point, or empty if the points are the same.
@@ -277,26 +348,191 @@ class GameMap:
         :return: The map object
         """
         map_width, map_height = map(int, read_input().split())
+        positions = PositionTable.for_size(map_width, map_height)
         game_map = [[None for _ in range(map_width)]
                     for _ in range(map_height)]
         for y_position in range(map_height):
             cells = read_input().split()
             for x_position in range(map_width):
                 game_map[y_position][x_position] = MapCell(
-                    Position(x_position, y_position), int(cells[x_position]))
+                    positions.get(x_position, y_position), int(cells[x_position]))
         return GameMap(game_map, map_width, map_height)
 
+    @staticmethod
+    def _from_halite(halite, width, height):
+        """
+        Creates a map object from halite amounts already parsed from the engine's input
+        :param halite: Flat, row-major list of the halite in every cell
+        :param width: The map width
+        :param height: The map height
+        :return: The map object
+        """
+        positions = PositionTable.for_size(width, height).positions
+        game_map = [[
+            MapCell(positions[y * width + x], halite[y * width + x])
+            for x in range(width)
+        ] for y in range(height)]
+        return GameMap(game_map, width, height)
+
     def _update(self):
         """
         Updates this map object from the input given by the game engine
         :return: nothing
         """
+        cell_ints = []
+        for _ in range(int(read_input())):
+            cell_ints.extend(map(int, read_input().split()))
+        self._apply_updates(cell_ints)
+
+    def _apply_updates(self, cell_ints):
+        """
+        Updates this map object from cell updates already parsed from the engine's input
+        :param cell_ints: Flat list of x, y, halite for each changed cell
+        :return: nothing
+        """
         # Mark cells as safe for navigation (will re-mark unsafe cells
         # later)
-        for y in range(self.height):
-            for x in range(self.width):
-                self[Position(x, y)].ship = None
+        for cell in self._occupied:
+            cell._ship = None
+        self._occupied.clear()
 
-        for _ in range(int(read_input())):
-            cell_x, cell_y, cell_energy = map(int, read_input().split())
-            self[Position(cell_x, cell_y)].halite_amount = cell_energy
+        self.dirty_cells = set()
+        fields = iter(cell_ints)
+        for cell_x, cell_y, cell_energy in zip(fields, fields, fields):
+            cell = self._cells[cell_y][cell_x]
+            cell.halite_amount = cell_energy
+            self.dirty_cells.add(cell.position)
+
+
+class CellView(BaseCell):
+    """
+    A lightweight view of a single cell of an ArrayGameMap.
+
+    Reads and writes go straight through to the map's arrays, so views are
+    cheap to create and never go stale.
+    """
+    __slots__ = ('_map', 'index')
+
+    def __init__(self, game_map, index):
+        self._map = game_map
+        self.index = index
+
+    @property
+    def position(self):
+        return self._map.position_of(self.index)
+
+    @property
+    def halite_amount(self):
+        return int(self._map.halite.flat[self.index])
+
+    @halite_amount.setter
+    def halite_amount(self, amount):
+        self._map.halite.flat[self.index] = amount
+
+    @property
+    def ship(self):
+        return self._map._ships.get(self.index)
+
+    @ship.setter
+    def ship(self, ship):
+        if ship is None:
+            self._map._ships.pop(self.index, None)
+            self._map.ship_owner.flat[self.index] = -1
+        else:
+            self._map._ships[self.index] = ship
+            self._map.ship_owner.flat[self.index] = ship.owner
+
+    @property
+    def structure(self):
+        return self._map._structures.get(self.index)
+
+    @structure.setter
+    def structure(self, structure):
+        if structure is None:
+            self._map._structures.pop(self.index, None)
+            self._map.structure_owner.flat[self.index] = -1
+        else:
+            self._map._structures[self.index] = structure
+            self._map.structure_owner.flat[self.index] = structure.owner
+
+
+class ArrayGameMap(GameMap):
+    """
+    A game map backed by contiguous arrays instead of MapCell objects.
+
+    halite, ship_owner and structure_owner are height x width integer arrays
+    (owners are player ids, -1 when empty) so whole-map queries can be
+    vectorized. Indexing still returns a cell, as a CellView.
+    """
+
+    def __init__(self, halite, width, height):
+        self.width = width
+        self.height = height
+        self.positions = PositionTable.for_size(width, height)
+        self.distances = DistanceTable.for_size(width, height)
+        self.halite = halite
+        self.ship_owner = np.full((height, width), -1, dtype=np.int16)
+        self.structure_owner = np.full((height, width), -1, dtype=np.int16)
+        self._ships = {}  # {cell index: ship}
+        self._structures = {}  # {cell index: structure}
+        self.dirty_cells = set()
+
+    def __getitem__(self, location):
+        if isinstance(location, Entity):
+            location = location.position
+        elif not isinstance(location, Position):
+            return None
+        return CellView(self, self.index_of(location))
+
+    def __iter__(self):
+        return (CellView(self, index)
+                for index in range(self.width * self.height))
+
+    def index_of(self, position):
+        """
+        :param position: A position object, normalized for you.
+        :return: The flat index of that position in the map's arrays
+        """
+        return (position.y % self.height) * self.width + \
+            position.x % self.width
+
+    def position_of(self, index):
+        """
+        :param index: A flat index into the map's arrays.
+        :return: The position of that cell
+        """
+        return self.positions.positions[index]
+
+    def total_halite(self):
+        return int(self.halite.sum())
+
+    @staticmethod
+    def _generate():
+        """
+        Creates an array backed map object from the input given by the game engine
+        :return: The map object
+        """
+        map_width, map_height = map(int, read_input().split())
+        halite = np.empty((map_height, map_width), dtype=np.int32)
+        for y_position in range(map_height):
+            halite[y_position] = [int(cell) for cell in read_input().split()]
+        return ArrayGameMap(halite, map_width, map_height)
+
+    @staticmethod
+    def _from_halite(halite, width, height):
+        halite = np.array(halite, dtype=np.int32).reshape(height, width)
+        return ArrayGameMap(halite, width, height)
+
+    def _apply_updates(self, cell_ints):
+        if self._ships:
+            self.ship_owner.flat[list(self._ships)] = -1
+            self._ships.clear()
+
+        self.dirty_cells = set()
+        if cell_ints:
+            cells = np.array(cell_ints, dtype=np.int32).reshape(-1, 3)
+            self.halite[cells[:, 1], cells[:, 0]] = cells[:, 2]
+            fields = iter(cell_ints)
+            self.dirty_cells.update(
+                self.positions.get(cell_x, cell_y)
+                for cell_x, cell_y, _ in zip(fields, fields, fields))
@@ -0,0 +1,84 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+
+# name of the logger for one line per turn summaries, kept in every profile
+SUMMARY_LOGGER = "summary"
+# log records buffered for the background thread before new ones are dropped
+QUEUE_CAPACITY = 10000
+
+# {profile: (root level, whether records are written on a background thread)}
+PROFILES = {
+    "debug": (logging.DEBUG, False),
+    "async": (logging.DEBUG, True),
+    "production": (logging.WARNING, True),
+}
+
+_listener = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a bounded queue without formatting them; records that
+    don't fit are dropped and counted instead of blocking the turn.
+    """
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # formatting happens in the listener's thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup(filename, profile="debug"):
+    """
+    Send logging to a file with a profile from PROFILES. Does nothing if
+    logging is already set up, like logging.basicConfig.
+
+    The "async" and "production" profiles format and write records on a
+    background thread; "production" keeps only warnings and the summary
+    logger's turn summaries.
+    """
+    global _listener
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    level, background = PROFILES[profile]
+    file_handler = logging.FileHandler(filename, mode="w")
+    file_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root.setLevel(level)
+    logging.getLogger(SUMMARY_LOGGER).setLevel(logging.INFO)
+
+    if not background:
+        root.addHandler(file_handler)
+        return
+    record_queue = queue.Queue(QUEUE_CAPACITY)
+    root.addHandler(DroppingQueueHandler(record_queue))
+    _listener = logging.handlers.QueueListener(record_queue, file_handler)
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """write out any queued records, then shut logging down"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in logging.getLogger().handlers:
+            if getattr(handler, "dropped", 0):
+                for file_handler in _listener.handlers:
+                    file_handler.handle(logging.makeLogRecord({
+                        "levelno": logging.WARNING, "levelname": "WARNING",
+                        "msg": f"dropped {handler.dropped} log records",
+                    }))
+        _listener = None
+    logging.shutdown()
@@ -2,39 +2,52 @@ import json
 import logging
 import sys
 
-from .common import read_input
-from . import constants
-from .game_map import GameMap, Player
+from .common import LineReader
+from . import constants, logs
+from .entity import Shipyard
+from .game_map import ArrayGameMap, GameMap, Player
+from .positionals import interned
 
 
 class Game:
     """
     The game object holds all metadata pertinent to the game and all its contents
     """
-    def __init__(self):
+    def __init__(self, array_map=False, reader=None, log_profile="debug"):
         """
         Initiates a game object collecting all start-state instances for the contained items for pre-game.
         Also sets up basic logging.
+        :param array_map: Store the map in numpy arrays (see ArrayGameMap) rather than MapCell objects
+        :param reader: Where to read engine input from, e.g. a FrameReader. Defaults to reading line by line.
+            Readers note the perf_counter time input was last received in their received attribute.
+        :param log_profile: How to log to the bot's log file, one of hlt.logs.PROFILES
         """
         self.turn_number = 0
+        # perf_counter time the current frame started arriving, for timing turns
+        self.frame_received = None
+        self._reader = LineReader() if reader is None else reader
 
         # Grab constants JSON
-        raw_constants = read_input()
+        raw_constants = self._reader.readline()
         constants.load_constants(json.loads(raw_constants))
 
-        num_players, self.my_id = map(int, read_input().split())
+        num_players, self.my_id = self._reader.read_ints(2)
 
-        logging.basicConfig(
-            filename="bot-{}.log".format(self.my_id),
-            filemode="w",
-            level=logging.DEBUG,
-        )
+        logs.setup("bot-{}.log".format(self.my_id), log_profile)
 
+        shipyards = [self._reader.read_ints(3) for _ in range(num_players)]
+
+        map_width, map_height = self._reader.read_ints(2)
+        self.game_map = (ArrayGameMap if array_map else GameMap)._from_halite(
+            self._reader.read_ints(map_width * map_height), map_width,
+            map_height)
+
+        # Players are created after the map so shipyards get interned positions
         self.players = {}
-        for player in range(num_players):
-            self.players[player] = Player._generate()
+        for player, shipyard_x, shipyard_y in shipyards:
+            self.players[player] = Player(
+                player, Shipyard(player, -1, interned(shipyard_x, shipyard_y)))
         self.me = self.players[self.my_id]
-        self.game_map = GameMap._generate()
 
     def ready(self, name):
         """
@@ -48,14 +61,18 @@ class Game:
         Updates the game object's state.
         :returns: nothing.
         """
-        self.turn_number = int(read_input())
-        logging.info("=============== TURN {:03} ================".format(self.turn_number))
+        reader = self._reader
+        self.turn_number = reader.read_int()
+        # the turn number starts the frame, so its input just arrived
+        self.frame_received = reader.received
+        logging.info("=============== TURN %03d ================", self.turn_number)
 
         for _ in range(len(self.players)):
-            player, num_ships, num_dropoffs, halite = map(int, read_input().split())
-            self.players[player]._update(num_ships, num_dropoffs, halite)
+            player, num_ships, num_dropoffs, halite = reader.read_ints(4)
+            self.players[player]._load(halite, reader.read_ints(4 * num_ships),
+                                       reader.read_ints(3 * num_dropoffs))
 
-        self.game_map._update()
+        self.game_map._apply_updates(reader.read_ints(3 * reader.read_int()))
 
         # Mark cells with ships as unsafe for navigation
         for player in self.players.values():
@@ -62,40 +62,53 @@ class Direction:
 
 
 class Position:
+    """
+    An immutable pair of map coordinates.
+
+    Positions handed out by a PositionTable are interned and normalized, and
+    know their wrapped neighbours, so offsets and surrounding cardinals from
+    them allocate nothing.
+    """
+    __slots__ = ('x', 'y', '_hash', '_index', '_neighbours')
+
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
+        _set(self, 'x', x)
+        _set(self, 'y', y)
+        _set(self, '_hash', hash((x, y)))
+        _set(self, '_index', None)
+        _set(self, '_neighbours', None)
 
     def directional_offset(self, direction):
         """
         Returns the position considering a Direction cardinal tuple
-        :param direction: the direction cardinal tuple
+        :param direction: the direction cardinal tuple, or any other (dx, dy) offset
         :return: a new position moved in that direction
         """
-        return self + Position(*direction)
+        if self._neighbours is not None:
+            if direction == Direction.Still:
+                return self
+            index = _CARDINAL_INDEX.get(direction)
+            if index is not None:
+                return self._neighbours[index]
+        return Position(self.x + direction[0], self.y + direction[1])
 
     def get_surrounding_cardinals(self):
         """
         :return: Returns a list of all positions around this specific position in each cardinal direction
         """
+        if self._neighbours is not None:
+            return list(self._neighbours)
         return [self.directional_offset(current_direction) for current_direction in Direction.get_all_cardinals()]
 
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
     def __add__(self, other):
         return Position(self.x + other.x, self.y + other.y)
 
     def __sub__(self, other):
         return Position(self.x - other.x, self.y - other.y)
 
-    def __iadd__(self, other):
-        self.x += other.x
-        self.y += other.y
-        return self
-
-    def __isub__(self, other):
-        self.x -= other.x
-        self.y -= other.y
-        return self
-
     def __abs__(self):
         return Position(abs(self.x), abs(self.y))
 
@@ -106,9 +119,70 @@ class Position:
         return not self.__eq__(other)
 
     def __hash__(self):
-        return hash((self.x, self.y))
+        return self._hash
 
     def __repr__(self):
         return "{}({}, {})".format(self.__class__.__name__,
                                    self.x,
                                    self.y)
+
+
+_set = object.__setattr__
+# Index of each cardinal in a position's neighbours, in get_all_cardinals order
+_CARDINAL_INDEX = {
+    direction: index
+    for index, direction in enumerate(Direction.get_all_cardinals())
+}
+
+
+class PositionTable:
+    """
+    The interned, normalized positions of a width x height map, in row-major
+    order, with their wrapped neighbours precomputed.
+
+    There is one table per map size, shared through for_size. The table of
+    the map being played is the active one, used by interned.
+    """
+    _tables = {}
+    active = None
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.positions = [Position(x, y) for y in range(height) for x in range(width)]
+        for index, position in enumerate(self.positions):
+            _set(position, '_index', index)
+            _set(position, '_neighbours', tuple(
+                self.get(position.x + dx, position.y + dy)
+                for dx, dy in Direction.get_all_cardinals()))
+        # The same neighbours as flat indices, for graph searches over the map
+        self.neighbour_indices = [
+            tuple(neighbour._index for neighbour in position._neighbours)
+            for position in self.positions
+        ]
+
+    @classmethod
+    def for_size(cls, width, height):
+        """
+        :return: The shared table for a map size, which becomes the active table
+        """
+        if (width, height) not in cls._tables:
+            cls._tables[width, height] = PositionTable(width, height)
+        cls.active = cls._tables[width, height]
+        return cls.active
+
+    def get(self, x, y):
+        """
+        :return: The interned position at x, y, wrapped around the map
+        """
+        return self.positions[(y % self.height) * self.width + x % self.width]
+
+
+def interned(x, y):
+    """
+    :return: The interned position at x, y on the active map, or a new Position if no map is loaded
+    """
+    table = PositionTable.active
+    if table is None:
+        return Position(x, y)
+    return table.get(x, y)
@@ -0,0 +1,46 @@
+import numpy as np
+
+from hlt import constants
+
+from clusters import diamond_sums
+from threats import enemy_occupancy
+
+
+class InspirationMap:
+    """
+    Which cells would inspire a ship of ours this turn, and so how much a
+    ship mining each cell can expect to get.
+
+    Enemy ships are counted within INSPIRATION_RADIUS of every cell at once,
+    by summing an enemy occupancy grid over a diamond shaped window.
+    """
+
+    def __init__(self, game, game_map):
+        self.update(game, game_map)
+
+    def update(self, game, game_map):
+        """recompute the grids from this turn's enemy ships and halite"""
+        self.game_map = game_map
+        occupancy = enemy_occupancy(game, game_map)
+        self.enemy_counts = diamond_sums(occupancy,
+                                         constants.INSPIRATION_RADIUS)
+        if constants.INSPIRATION_ENABLED:
+            self.inspired = \
+                self.enemy_counts >= constants.INSPIRATION_SHIP_COUNT
+        else:
+            self.inspired = np.zeros(occupancy.shape, dtype=bool)
+
+        # fraction of a cell's halite a ship gets in a turn of mining it
+        self.extraction_rate = np.where(
+            self.inspired,
+            (1 + constants.INSPIRED_BONUS_MULTIPLIER)
+            / constants.INSPIRED_EXTRACT_RATIO,
+            1 / constants.EXTRACT_RATIO)
+        self.expected_yield = game_map.halite * self.extraction_rate
+
+    def is_inspired(self, position):
+        return bool(self.inspired[position.y, position.x])
+
+    def yield_at(self, position):
+        """halite a ship can expect from mining this cell for a turn"""
+        return self.expected_yield[position.y, position.x].item()
@@ -0,0 +1,66 @@
+from bisect import bisect_right
+
+import numpy as np
+
+from hlt import constants
+
+# consecutive turns of mining the tables cover
+MAX_MINING_TURNS = 32
+
+
+class MiningTables:
+    """
+    Halite a ship gains from mining a cell for k turns in a row, for every
+    cell halite h up to 2 * MAX_HALITE, with the engine's rounding: each turn
+    takes ceil(h / ratio) from the cell, and inspired ships get the bonus on
+    top, rounded down. Built once per game, looked up in O(1) (or a bisect
+    over MAX_MINING_TURNS values).
+    """
+
+    def __init__(self, turns=MAX_MINING_TURNS):
+        self.turns = turns
+        self.max_cell = 2 * constants.MAX_HALITE
+        # {inspired: per h, cumulative halite gained after 0..turns turns}
+        self._gained = {}
+        # {inspired: per h, minus the halite gained on each of the turns}
+        self._marginal = {}
+        for inspired in (False, True):
+            gained = self._build(inspired)
+            self._gained[inspired] = gained.T.tolist()
+            self._marginal[inspired] = (-np.diff(gained, axis=0)).T.tolist()
+
+    def _build(self, inspired):
+        if inspired:
+            ratio = constants.INSPIRED_EXTRACT_RATIO
+            bonus = constants.INSPIRED_BONUS_MULTIPLIER
+        else:
+            ratio = constants.EXTRACT_RATIO
+            bonus = 0
+        halite = np.arange(self.max_cell + 1, dtype=np.int64)
+        gained = np.zeros((self.turns + 1, self.max_cell + 1), dtype=np.int64)
+        for turn in range(1, self.turns + 1):
+            extracted = -(-halite // ratio)
+            halite = halite - extracted
+            gained[turn] = gained[turn - 1] + extracted + \
+                (extracted * bonus).astype(np.int64)
+        return gained
+
+    def gained(self, halite, turns, inspired=False):
+        """halite gained mining a cell of this halite for this many turns (ignoring cargo space)"""
+        return self._gained[inspired][min(halite, self.max_cell)][
+            min(turns, self.turns)]
+
+    def mine_turns(self, halite, threshold, inspired=False, space=None):
+        """
+        How many turns in a row mining this cell gains at least threshold
+        (> 0) each, for a ship with this much cargo space left (default all
+        of it)
+        """
+        if space is None:
+            space = constants.MAX_HALITE
+        halite = min(halite, self.max_cell)
+        # the marginal gains only shrink, as does the space left
+        by_yield = bisect_right(self._marginal[inspired][halite], -threshold)
+        by_space = bisect_right(self._gained[inspired][halite],
+                                space - threshold)
+        return min(by_yield, by_space)
@@ -1,5 +1,8 @@
 class Modes:
-    COLLECTING = "COLLECTING"
-    DEPOSITING = "DEPOSITING"
-    ENDGAME = "ENDGAME"
-    NORMAL = "NORMAL"
\ No newline at end of file
+    COLLECTING = 0
+    DEPOSITING = 1
+    ENDGAME = 2
+    NORMAL = 3
+    BUILDING = 4
+
+    NAMES = ("COLLECTING", "DEPOSITING", "ENDGAME", "NORMAL", "BUILDING")
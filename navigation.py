@@ -1,17 +1,51 @@
 import hlt
 from hlt import constants, Game
-from hlt.positionals import Position, Direction
-from hlt.game_map import GameMap, Player, MapCell
+from hlt.positionals import Position
 from hlt.entity import Ship
+from clusters import HaliteStats
+from dropoffs import DropoffPlanner
+from fields import FlowFields, ReturnField
+from inspiration import InspirationMap
+from mining import MiningTables
+from threats import ThreatMap
+from moves import MoveResolver
+from recall import RecallScheduler
+from spacetime import ReservationTable, plan_path
+from spawning import SpawnModel
 from modes import Modes
 import logging
 import random
-import math
+from collections import deque
+import numpy as np
 
 CLUSTER_TOBASE = 3
 BASE_POXIMITY_MULTIPLIER = 5
-STAY_STILL_WEIGHT = 1.8
-PROD_STOP_TURN = 220
+# halite a turn of mining gains that is always worth staying for, and the
+# least a turn must gain to be worth staying for
+STAY_YIELD = 25
+MIN_MOVE_ON_YIELD = 1
+# path costs of flow fields: per move, and extra for moving off a cell
+# holding one of our ships. Moves dominate, so collecting ships take the
+# shortest paths (avoiding halite would steer them off what they mine)
+# and halite burnt and congestion only pick among those.
+FLOW_STEP_COST = 1000
+CONGESTION_COST = 5
+# ships carrying at least this much keep off cells enemies could move onto
+THREAT_AVOID_CARGO = 700
+# plan dropoffs only with at least this many ships per base, and this many
+# turns left to pay them back
+MIN_SHIPS_PER_BASE = 10
+DROPOFF_MIN_TURNS_LEFT = 100
+# turns between scoring the map for dropoff sites
+DROPOFF_PLAN_INTERVAL = 5
+# halite is only saved up for a dropoff once its builder is this close
+DROPOFF_RESERVE_DISTANCE = 5
+# turns ahead homebound ships plan their paths around each other
+SPACETIME_WINDOW = 8
+# destination or preferred move of a ship without one
+NO_CELL = -1
+# turns of used positions to keep for debugging, 0 for none
+POSITION_HISTORY_TURNS = 0
 
 
 class Navigation:
@@ -21,113 +55,200 @@ class Navigation:
         self.player = game.me
         self.ships = game.me.get_ships()
         self.bases = [game.me.shipyard] + game.me.get_dropoffs()
-        self.ship_states = {}  # {ship.id: ShipState()}
+        self.base_positions = {base.position for base in self.bases}
+        # straight line distance to our nearest base, lowered as bases are added
+        self.base_straight_distance = np.min(
+            [self.game_map.distances.straight_from_point(base.position)
+             for base in self.bases], axis=0)
+        self.ship_states = ShipStates()
         self.top_clusters = None
         self.command_queue = []
-        self.PROD_STOP_TURN = PROD_STOP_TURN
         self.game_mode = Modes.NORMAL
         self.commands = {}  #{ship.id: (move)}
         self.commands_queue = {}  # {ship.id: command}
         self.total_halite = 0
         self.inital_halite = 0
-        self.used_positions = []
+        self.halite_stats = HaliteStats(
+            self.game_map, multiplier=self.base_proximity_multiplier())
+        self.return_field = ReturnField(self.game_map, self.bases)
+        self.inspiration = InspirationMap(game, self.game_map)
+        self.threats = ThreatMap(game, self.game_map)
+        self.mining = MiningTables()
+        self.flow_fields = FlowFields(
+            self.game_map, FLOW_STEP_COST, CONGESTION_COST)
+        self.resolver = MoveResolver(self.game_map)
+        self.recalls = RecallScheduler()
+        self.reservations = ReservationTable(SPACETIME_WINDOW + 1)
+        self.blocked_cells = set()  # cells of enemy ships this turn
+        self.sink_cells = set()  # cells of bases ships may pile onto
+        self.dropoffs = DropoffPlanner(self.game_map, self.bases)
+        self.builder = None  # id of the ship sent to build a dropoff
+        self.dropoff_site = None  # position of the dropoff it builds
+        self.dropoff_spent = 0  # halite spent on a dropoff this turn
+        self.spawn_model = SpawnModel(game)
+        self.spawned = False  # whether a ship was spawned this turn
+        self.worth_spawning = True
+        self.used_positions = set()  # cells ships were commanded into this turn
+        self.position_history = deque(maxlen=POSITION_HISTORY_TURNS)
 
     def state(self, ship):
         return self.ship_states[ship.id]
 
-    def mark_enemy_adjacent_unsafe(self):
-        for bot in self.game:
-            if bot.id is not self.player.id:
-                for ship in bot.get_ships():
-                    north = ship.position.directional_offset(Direction.North)
-                    east = ship.position.directional_offset(Direction.East)
-                    south = ship.position.directional_offset(Direction.South)
-                    west = ship.position.directional_offset(Direction.West)
-                    for cell in [north, east, south, west]:
-                        self.game_map[cell].mark_unsafe(ship)
+    def destination(self, ship):
+        """the ship's destination as a position, None if it has none"""
+        cell = self.ship_states[ship.id].destination
+        return None if cell == NO_CELL else self.game_map.position_of(cell)
+
+    def set_destination(self, ship, position):
+        self.ship_states[ship.id].destination = self.game_map.index_of(
+            position)
+
+    def set_preferred_move(self, ship, position):
+        self.ship_states[ship.id].preferred_move = self.game_map.index_of(
+            position)
 
     def closest_dropoff(self, ship):
-        min_dist = 9000
-        closest_base = None
-        for base in self.bases:
-            if self.game_map.calculate_distance(ship.position,
-                                                base.position) < min_dist:
-                closest_base = base
-        return closest_base.position
-
-    def farthest_ship_distance(self) -> int:
-        bases = self.bases
-        ships = self.ships
-        if ships and bases:
-            max_distances = []
-            for base in bases:
-                distances = [
-                    self.game_map.calculate_distance(ship.position,
-                                                     base.position)
-                    for ship in ships
-                ]
-                max_distance = max(distances)
-                max_distances.append(max_distance)
-
-            return max(max_distances)
-        else:
-            return 0
+        return self.return_field.nearest_base(ship.position)
 
     def check_endgame(self):
-        turns_to_recall = self.farthest_ship_distance() + len(self.ships) * 0.3
-        turns_left = constants.MAX_TURNS - self.game.turn_number
-        if turns_left < turns_to_recall:
-            for ship in self.ships:
+        """recall the ships due home for the end of the game, see RecallScheduler"""
+        self.recalls.update(self.ships, self.return_field,
+                            self.game.turn_number)
+        for ship in self.ships:
+            if self.ship_states[ship.id].mode != Modes.ENDGAME and \
+                    self.recalls.due(ship, self.game.turn_number):
+                self.recall(ship)
                 self.game_mode = Modes.ENDGAME
-                self.ship_states[ship.id].destination = self.closest_dropoff(
-                    ship)
 
     def _initialize_ship_states(self):
-        """initialize all newly created ships with a default ship state"""
-        for ship in self.ships:
-            if ship.id not in self.ship_states:
-                state = ShipState(Modes.COLLECTING)
-                self.ship_states[ship.id] = state
+        """give new ships a default state and drop the states of lost ones"""
+        self.ship_states.sync(self.ships)
 
     def start_positions(self):
         staring_positions = self.player.shipyard.position.get_surrounding_cardinals(
         )
         return staring_positions
 
-    def avoid(self, destination):
-        if destination is Direction.North or destination is Direction.South:
-            return self.safe_direction([Direction.East, Direction.West])
-        elif destination is Direction.West or destination is Direction.East:
-            return self.safe_direction([Direction.North, Direction.South])
-        else:
-            return Direction.Still
-
     def can_afford_move(self, ship: Ship):
         location_halite = self.game_map[ship.position].halite_amount
         move_cost = location_halite * 0.1
         return ship.halite_amount >= move_cost
 
-    def low_hal_location(self, ship: Ship):
-        return self.game_map[ship.
-                             position].halite_amount < constants.MAX_HALITE * 0.1
-        # TODO: MAKE THIS BASED ON A USER DEFINED PARAM
+    def mining_gain(self, position):
+        """halite a ship gains from a turn of mining this cell"""
+        return self.mining.gained(self.game_map[position].halite_amount, 1,
+                                  self.inspiration.is_inspired(position))
+
+    def move_on_yield(self, ship: Ship):
+        """
+        Least halite a turn of mining here must gain to beat moving on: half
+        of what the best next cell gains net of the move's cost (moving
+        costs a turn), between MIN_MOVE_ON_YIELD and STAY_YIELD
+        """
+        move_cost = self.game_map[ship.position].halite_amount // \
+            constants.MOVE_COST_RATIO
+        best = max((self.mining_gain(position) for position in
+                    self.steps_towards(ship, self.destination(ship))),
+                   default=0)
+        return max(MIN_MOVE_ON_YIELD, min(STAY_YIELD, (best - move_cost) / 2))
+
+    def mine_turns(self, ship: Ship):
+        """how many more turns mining in place beats moving on"""
+        return self.mining.mine_turns(
+            self.game_map[ship.position].halite_amount,
+            self.move_on_yield(ship),
+            self.inspiration.is_inspired(ship.position),
+            constants.MAX_HALITE - ship.halite_amount)
 
     def should_move(self, ship: Ship):
-        return self.can_afford_move(ship) and self.low_hal_location(ship)
+        return self.can_afford_move(ship) and self.mine_turns(ship) == 0
 
     def update(self, game: hlt.Game):
         """update all game data and reset turn specific info"""
+        self.command_queue = []
+        self.commands = {}
+        self.commands_queue = {}
+        if self.position_history.maxlen:
+            self.position_history.append(self.used_positions)
+        self.used_positions = set()
+        self.spawn_model.observe(
+            game, self.dropoff_spent
+            + (constants.SHIP_COST if self.spawned else 0))
+        self.dropoff_spent = 0
+        self.spawned = False
         self.game_map = game.game_map
         self.player = game.me
         self.ships = game.me.get_ships()
+        self._sync_bases()
         self.calc_total_halite()
-        self.command_queue = []
-        self.commands = {}
-        self.commands_queue = {}
+        self.worth_spawning = self.spawn_model.worth_spawning(
+            game, self.total_halite, self.halite_per_cell)
+        self.return_field.update(self.game_map, self.bases)
+        self.flow_fields.update(self.game_map, self.ships)
+        self.inspiration.update(game, self.game_map)
+        self.threats.update(game, self.game_map)
         self._initialize_ship_states()
-        self._reset_current_moves()
         self.richest_clusters()
         self.check_endgame()
+        self.plan_dropoff()
+        self.reservations.advance(game.turn_number)
+        self.reservations.sync({ship.id for ship in self.ships})
+        self._reset_resolver()
+
+    def _sync_bases(self):
+        """add the dropoffs built since last turn to the bases"""
+        for dropoff in self.player.get_dropoffs():
+            if dropoff.position not in self.base_positions:
+                self.add_base(dropoff)
+
+    def add_base(self, base):
+        """update the nearest base structures for a new base"""
+        self.bases.append(base)
+        self.base_positions.add(base.position)
+        self.dropoffs.add_base(base.position)
+        np.minimum(self.base_straight_distance,
+                   self.game_map.distances.straight_from_point(base.position),
+                   out=self.base_straight_distance)
+        self.halite_stats.set_multiplier(self.base_proximity_multiplier())
+        logging.info("new base at %s", base.position)
+
+    def _reset_resolver(self):
+        """start the turn's move resolution around enemy ships"""
+        self.resolver.reset(self.game_map)
+        self.resolver.set_threats(self.threats.threatened)
+        self.blocked_cells = set()
+        for player in self.game.players.values():
+            if player.id != self.player.id:
+                for ship in player.get_ships():
+                    self.resolver.block(ship.position)
+                    self.blocked_cells.add(
+                        self.game_map.index_of(ship.position))
+        # ships may pile onto bases on the final turns
+        self.sink_cells = set()
+        for base in self.bases:
+            if self.recalls.stacking(base.position):
+                self.resolver.allow_stacking(base.position)
+                self.sink_cells.add(self.game_map.index_of(base.position))
+
+    def planning_order(self, ships):
+        """ships ordered by how much their move matters: homebound first, then by cargo"""
+        return sorted(
+            ships,
+            key=lambda ship: (self.ship_states[ship.id].mode == Modes.
+                              COLLECTING, -ship.halite_amount))
+
+    def fallback(self, ship):
+        """
+        Cheap move for a ship there was no time to plan: repeat last turn's
+        preferred move if it is still adjacent, otherwise stay still
+        """
+        preferred = self.ship_states[ship.id].preferred_move
+        if preferred != NO_CELL and preferred in \
+                self.game_map.positions.neighbour_indices[
+                    self.game_map.index_of(ship.position)]:
+            self.propose(ship, [self.game_map.position_of(preferred)])
+        else:
+            self.stay_still(ship)
 
     def select_move_hueristic(self, ship: Ship, destination: Position = None):
         surrounding_positions = ship.position.get_surrounding_cardinals()
@@ -142,26 +263,15 @@ class Navigation:
             if best_positions is not None:
                 surrounding_positions = best_positions
         current_position = ship.position
-        halite_locations = {(position): self.game_map[position].halite_amount
+        halite_locations = {(position): self.inspiration.yield_at(position)
                             for position in surrounding_positions}
-        halite_locations[current_position] = self.game_map[
-            current_position].halite_amount * 1.8
+        halite_locations[current_position] = self.inspiration.yield_at(
+            current_position) * 1.8
         new_position = max(halite_locations, key=halite_locations.get)
         return new_position  #
 
     def select_rich_destination(self, ship: Ship):
-        # get closest cluster to ship
-        closest_cluster = None
-        distance_to_cluster = self.game_map.width
-        for cluster in self.top_clusters:
-            distance = self.game_map.calculate_distance(
-                ship.position, cluster.position)
-            if distance < distance_to_cluster:
-                distance_to_cluster = distance
-                closest_cluster = cluster
-        #self.ship_states[ship.id].destination = closest_cluster.rich_position
-        self.ship_states[ship.id].destination = random.choice(
-            self.top_clusters).position
+        self.set_destination(ship, random.choice(self.top_clusters).position)
 
     def unstuck(self, ship: Ship):
         pass
@@ -172,9 +282,8 @@ class Navigation:
         """
         possible_dests = ship.position.get_surrounding_cardinals()
         random.shuffle(possible_dests)
-        self.ship_states[ship.id].preferred_move = possible_dests[0]
-        move = self.move_safe(ship, possible_dests)
-        self.command(ship, ship.move(move), move=move)
+        self.set_preferred_move(ship, possible_dests[0])
+        self.propose(ship, possible_dests)
 
     def dropoff_surrounded(self, dropoff: Position):
         if self.game_map[dropoff].is_occupied:
@@ -187,303 +296,358 @@ class Navigation:
         return False
 
     def calc_straight_distance(self, source: Position, dest: Position):
-        source = self.game_map.normalize(source)
-        dest = self.game_map.normalize(dest)
-        direction_vector = abs(source - dest)
-        shortest_x = min(direction_vector.x,
-                         self.game_map.width - direction_vector.x)
-        shortest_y = min(direction_vector.y,
-                         self.game_map.height - direction_vector.y)
-        return math.sqrt(shortest_x**2 + shortest_y**2)
+        return self.game_map.distances.straight_distance(source, dest)
 
     def calc_total_halite(self):
-        total_halite = 0
-        for cell in self.game_map:
-            total_halite += cell.halite_amount
+        self.halite_stats.update(self.game_map)
+        total_halite = self.halite_stats.total_halite
         self.total_halite = total_halite
         if self.inital_halite == 0:
             self.inital_halite = total_halite
 
+    def base_proximity_multiplier(self):
+        """grid weighting clusters close to our bases"""
+        return np.where(
+            self.base_straight_distance < self.game_map.width / CLUSTER_TOBASE,
+            BASE_POXIMITY_MULTIPLIER, 1)
+
     def richest_clusters(self, top_n: int = 5):
-        """returns a list of top clusters"""
-        spread_clusters = {}
-        for x in range(self.game_map.width):
-            if x == 1 or (x - 1) % 3 == 0:
-                for y in range(self.game_map.height):
-                    if y == 1 or (y - 1) % 3 == 0:
-                        cell = self.game_map[Position(x, y)]
-                        spread_clusters[Position(x, y)] = Cluster(
-                            self.game_map, cell)
-
-        for position, cluster in spread_clusters.items():
-            distance = self.calc_straight_distance(
-                position, self.player.shipyard.position)
-            if distance < self.game_map.width / CLUSTER_TOBASE:
-                cluster.halite_multiplier = BASE_POXIMITY_MULTIPLIER
-
-        sorted_cells = sorted(spread_clusters.values(), reverse=True)
-        sorted_cells = sorted_cells[:top_n]
-
-        self.top_clusters = sorted_cells
-
-    def _reset_current_moves(self):
-        [ship.reset_moves() for ship in self.ship_states.values()]
+        """sets top_clusters to the top_n richest clusters"""
+        self.top_clusters = self.halite_stats.top_clusters(
+            self.game_map, top_n)
 
     def command(self, ship, command, move=None):
         self.commands[ship.id] = move
         self.commands_queue[ship.id] = command
         self.command_queue.append(command)
         if move:
-            self.used_positions.append(ship.position + Position(*move))
+            self.used_positions.add(ship.position.directional_offset(move))
+
+    def spawning(self):
+        """whether one more ship is still worth its cost, see SpawnModel"""
+        return self.worth_spawning
 
     def can_produce(self):
-        return (self.game.turn_number <= self.PROD_STOP_TURN
-                and self.player.halite_amount >= constants.SHIP_COST
-                and not self.game_map[self.player.shipyard].is_occupied)
+        """call after process_turn, once the ships' final cells are known"""
+        halite = self.player.halite_amount - self.dropoff_spent - \
+            self.dropoff_reserve()
+        return (self.spawning() and halite >= constants.SHIP_COST
+                and self.resolver.is_free(self.player.shipyard.position))
+
+    def spawn(self):
+        self.command(self.player.shipyard, self.player.shipyard.spawn())
+        self.spawned = True
 
     def go_home(self, ship) -> Position:
         """
         Set destination to closest dropoff point \n
         Changes mode to 'deositing'
         """
-        self.ship_states[ship.id].destination = self.closest_dropoff(ship)
+        self.set_destination(ship, self.closest_dropoff(ship))
         self.ship_states[ship.id].mode = Modes.DEPOSITING
 
+    def recall(self, ship):
+        """
+        Set destination to closest dropoff point for the end of the game \n
+        Changes mode to 'endgame'
+        """
+        self.set_destination(ship, self.closest_dropoff(ship))
+        self.ship_states[ship.id].mode = Modes.ENDGAME
+
     def going_home(self, ship):
-        base_poitions = [base.position for base in self.bases]
-        return ship.position in base_poitions
+        return ship.position in self.base_positions
 
     @property
     def halite_per_cell(self):
-        return round(self.total_halite / self.game_map.width**2)
+        return self.halite_stats.halite_per_cell
+
+    def steps_towards(self, ship, destination):
+        """
+        Positions next to the ship that get it closer to destination, best
+        first, from the destination's flow field or greedily if there's none
+        this turn
+        """
+        positions = self.flow_fields.closer_steps(ship.position, destination)
+        if positions is None:
+            positions = [
+                ship.position.directional_offset(move)
+                for move in self.game_map.get_unsafe_moves(
+                    ship.position, destination)
+            ]
+        return positions
 
     def navigate_max_halite(self, ship):
         # TODO: need to add logic to unmark spaces that we have left
-        destination = self.ship_states[ship.id].destination
-        possible_moves = self.game_map.get_unsafe_moves(
-            ship.position, destination)
-        possible_positions = [
-            ship.position.directional_offset(move) for move in possible_moves
-        ]
+        possible_positions = self.steps_towards(ship, self.destination(ship))
+        # rank by what mining each cell would yield, inspiration included
         halite_locations = {
-            position: self.game_map[position].halite_amount
+            position: self.mining_gain(position)
             for position in possible_positions
         }
-        halite_locations[ship.position] = self.game_map[
-            ship.position].halite_amount * STAY_STILL_WEIGHT
-        new_positions = sorted(
-            halite_locations, key=halite_locations.get, reverse=True)
+        # prevent from moving back on to dropoff
+        new_positions = [
+            position for position in sorted(
+                halite_locations, key=halite_locations.get, reverse=True)
+            if not self.game_map[position].has_structure
+        ]
 
         # add best move to preferred moves
-        self.ship_states[ship.id].preferred_move = new_positions[0]
+        if new_positions:
+            self.set_preferred_move(ship, new_positions[0])
 
-        move = self.move_safe(ship, new_positions)
-        # prevent from moving back on to dropoff
-        move = self.avoid_dropoffs(ship, move)
-        self.command(ship, ship.move(move), move=move)
-
-    def avoid_dropoffs(self, ship, move):
-        move_cell = self.game_map[ship.position.directional_offset(move)]
-        if move_cell.has_structure:
-            move_cell.ship = None
-            new_move = self.avoid(move)
-            return new_move
-        return move
-
-    def mark_safe(self, position: Position):
-        self.game_map[position].ship = None
-
-    def move_safe(self, ship, positions):
-        """ 
-        Chooses first safe cell in directions list to navigate into
+        self.propose(ship, new_positions)
+
+    def propose(self, ship, positions):
         """
-        new_moves = []
-        for position in positions:
-            move = position - ship.position
-            new_moves.append((move.x, move.y))
-
-        for i, cell in enumerate(positions):
-            if not self.game_map[cell].is_occupied:
-                self.game_map[cell].mark_unsafe(ship)
-                return new_moves[i]
-
-        return Direction.Still
-
-    def safe_direction(self, ship, directions):
-        positions = [
-            ship.position.directional_offset(direction)
-            for direction in directions
-        ]
-        for i, cell in enumerate(positions):
-            if not self.game_map[cell].is_occupied:
-                self.game_map[cell].mark_unsafe(ship)
-                return directions[i]
-        return Direction.Still
+        Request a move into the first of positions that is free once the
+        whole fleet is resolved in process_turn; fuller ships get priority
+        """
+        self.resolver.request(
+            ship, positions, priority=ship.halite_amount,
+            avoid_threats=self.ship_states[ship.id].mode != Modes.ENDGAME
+            and ship.halite_amount >= THREAT_AVOID_CARGO)
 
     def report_game_state(self):
-        logging.info(f"Game State: {self.game_mode}")
-        logging.info(
-            f"{round((1-self.total_halite/self.inital_halite)*100)}% of halite consumed {self.total_halite} remaining"
-        )
-        logging.info(f"{self.halite_per_cell} per cell")
-        logging.info(f"{self.used_positions}")
+        if not logging.getLogger().isEnabledFor(logging.INFO):
+            return
+        logging.info("Game State: %s", Modes.NAMES[self.game_mode])
+        logging.info("%d%% of halite consumed %d remaining",
+                     round((1 - self.total_halite / self.inital_halite) * 100),
+                     self.total_halite)
+        logging.info("%d per cell", self.halite_per_cell)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            # a copy, as records may be formatted after the list changes
+            logging.debug("%s", tuple(self.used_positions))
 
     def adjacent_dest(self, ship):
-        dest = self.ship_states[ship.id].destination
+        dest = self.destination(ship)
         dest_cards = dest.get_surrounding_cardinals()
         return ship.position in dest_cards
 
     def stay_still(self, ship: Ship):
-        self.command(ship, ship.stay_still(), move=Direction.Still)
+        self.propose(ship, [ship.position])
+
+    def planned_step(self, ship, goal, heuristic, next_cell):
+        """
+        Next position on the ship's space-time path to goal, keeping the
+        path it reserved on earlier turns while it is on it and has more
+        than half the window left, else planning and reserving a new one
+        around the paths of the ships planned before it. None if every way
+        is reserved.
+        :param goal: flat cell index
+        :param heuristic: flat list of a lower bound on each cell's moves to
+            goal, so the search doesn't follow detours
+        :param next_cell: flat list of each cell's next cell on the preferred
+            path to goal
+        """
+        cell = self.game_map.index_of(ship.position)
+        path = self.reservations.path(ship.id, cell)
+        if path is None or len(path) < 2 or \
+                path[-1] != goal and len(path) <= SPACETIME_WINDOW // 2:
+            path = plan_path(
+                self.reservations, ship.id, cell, goal, heuristic,
+                self.game_map.positions.neighbour_indices, SPACETIME_WINDOW,
+                next_cell, blocked=self.blocked_cells, sinks=self.sink_cells)
+            if path is None:
+                self.reservations.release(ship.id)
+                return None
+            self.reservations.reserve(ship.id, self.reservations.turn, path)
+        return self.game_map.position_of(path[1])
 
     def navigate_bline(self, ship):
-        destination = self.ship_states[ship.id].destination
-        unsafe_moves = self.game_map.get_unsafe_moves(ship.position,
-                                                      destination)
-        random.shuffle(unsafe_moves)
-        if not unsafe_moves:
-            self.ship_states[ship.id].preferred_move
-        else:
-            self.ship_states[
-                ship.id].preferred_move = ship.position.directional_offset(
-                    unsafe_moves[0])
-        move = self.game_map.naive_navigate(ship, destination)
-        self.command(ship, ship.move(move), move=move)
+        destination = self.destination(ship)
+        positions = self.steps_towards(ship, destination)
+        field = self.flow_fields.field(destination)
+        if field is not None:
+            # the field's steps follow its detours around halite and ships
+            # and may overestimate, so estimate moves by distance instead
+            distances = self.game_map.distances.from_point(destination)
+            planned = self.planned_step(
+                ship, self.game_map.index_of(destination),
+                distances.ravel().tolist(), field[2])
+            if planned is not None:
+                positions = [planned] + [
+                    position for position in positions if position != planned]
+        if positions:
+            self.set_preferred_move(ship, positions[0])
+        self.propose(ship, positions)
+
+    def navigate_home(self, ship):
+        """
+        Move one step along the ship's space-time path to the closest base,
+        falling back to the shortest path's step and the other moves towards it
+        """
+        base = self.return_field.nearest_base(ship.position)
+        next_position = self.return_field.next_step(ship.position)
+        positions = [next_position] + [
+            ship.position.directional_offset(move)
+            for move in self.game_map.get_unsafe_moves(ship.position, base)
+        ]
+        # the return field's steps are the fewest moves to the nearest base,
+        # never more than to this one
+        planned = self.planned_step(
+            ship, self.game_map.index_of(base), self.return_field.steps,
+            self.return_field.next_cell)
+        if planned is not None:
+            positions = [planned] + [
+                position for position in positions if position != planned]
+        self.set_preferred_move(ship, positions[0])
+        self.propose(ship, positions)
 
     def deposit_complete(self, ship):
         return (self.going_home(ship)) and (ship.halite_amount == 0)
 
     def dest_halite(self, ship):
-        return self.game_map[self.ship_states[ship.id]
-                             .destination].halite_amount
+        return self.game_map[self.destination(ship)].halite_amount
 
     def set_mode(self, ship, mode):
         self.ship_states[ship.id].mode = mode
 
     def on_dropoff(self, ship):
-        base_positions = [base.position for base in self.bases]
-        return ship.position in base_positions
+        return ship.position in self.base_positions
+
+    def plan_dropoff(self):
+        """
+        Send the closest collecting ship to build a dropoff on the best site,
+        if one is worth it, or give up a plan that no longer is
+        """
+        if self.builder is not None:
+            if self.builder not in self.ship_states or \
+                    self.game_mode == Modes.ENDGAME:
+                self.cancel_dropoff()
+            elif self.game.turn_number % DROPOFF_PLAN_INTERVAL or \
+                    self.dropoffs.site_value(
+                        self.game, self.game_map, self.dropoff_site,
+                        self.spawning()) > 0:
+                return
+            else:
+                self.cancel_dropoff()
+        if self.game.turn_number % DROPOFF_PLAN_INTERVAL:
+            return
+
+        turns_left = constants.MAX_TURNS - self.game.turn_number
+        if self.game_mode == Modes.ENDGAME or \
+                turns_left < DROPOFF_MIN_TURNS_LEFT or \
+                len(self.ships) < MIN_SHIPS_PER_BASE * len(self.bases):
+            return
+        best = self.dropoffs.best_site(self.game, self.game_map,
+                                       self.spawning())
+        if best is None:
+            return
+        site, value = best
+        collecting = [ship for ship in self.ships
+                      if self.ship_states[ship.id].mode == Modes.COLLECTING]
+        if not collecting:
+            return
+        distances = self.game_map.distances.pairwise(
+            [ship.position for ship in collecting], [site])
+        builder = collecting[int(distances.argmin())]
+        self.builder = builder.id
+        self.dropoff_site = site
+        self.set_mode(builder, Modes.BUILDING)
+        self.set_destination(builder, site)
+        logging.info("ship %d to build a dropoff at %s worth %d",
+                     builder.id, site, value)
+
+    def cancel_dropoff(self):
+        """forget the planned dropoff, sending its builder back to collecting"""
+        if self.builder in self.ship_states and \
+                self.ship_states[self.builder].mode == Modes.BUILDING:
+            self.ship_states[self.builder].mode = Modes.COLLECTING
+        self.builder = None
+        self.dropoff_site = None
+
+    def dropoff_reserve(self):
+        """halite to keep for the planned dropoff, beyond what its builder brings"""
+        if self.builder is None:
+            return 0
+        builder = self.player.get_ship(self.builder)
+        if self.game_map.calculate_distance(
+                builder.position, self.dropoff_site) > DROPOFF_RESERVE_DISTANCE:
+            return 0
+        return max(0, constants.DROPOFF_COST - builder.halite_amount
+                   - self.game_map[self.dropoff_site].halite_amount)
+
+    def can_build_dropoff(self, ship):
+        """whether the ship is on its dropoff site and we can pay for it"""
+        return (ship.id == self.builder
+                and ship.position == self.dropoff_site
+                and not self.game_map[ship.position].has_structure
+                and self.player.halite_amount >= self.dropoff_reserve())
+
+    def build_dropoff(self, ship):
+        """turn the ship into a dropoff, keeping its cell free of our other ships this turn"""
+        self.dropoff_spent = self.dropoff_reserve()
+        self.command(ship, ship.make_dropoff())
+        self.builder = None
+        self.dropoff_site = None
 
     def kamikaze(self, ship):
-        destination = self.ship_states[ship.id].destination
+        destination = self.destination(ship)
         moves = self.game_map.get_unsafe_moves(ship.position, destination)
         random.shuffle(moves)
         if moves:
-            self.command(ship, ship.move(moves[0]), move=moves[0])
+            self.propose(ship, [ship.position.directional_offset(moves[0])])
         else:
-            logging.info(f"ship at dropoff {ship.position == destination}, ")
+            logging.debug("ship at dropoff %s", ship.position == destination)
 
     def process_turn(self):
-        swapped_ships = []
-        for s_id, move in self.commands.items():
-            logging.info
-            if s_id and s_id >= 0 and s_id not in swapped_ships:
-                ship = self.player.get_ship(s_id)
-                ship_position = ship.position
-                pref_dest = self.ship_states[s_id].preferred_move
-                pref_move = pref_dest - ship_position
-
-                # check if ship is stuck
-                if move == Direction.Still and (
-                        pref_move.x, pref_move.y) is not Direction.Still:
-                    for other_ship in self.ships:
-                        if other_ship.id is not s_id and other_ship.id not in swapped_ships and s_id not in swapped_ships and pref_dest == other_ship.position and self.ship_states[other_ship.
-                                                                                                                                                                                    id].preferred_move == ship_position:
-                            logging.warn(
-                                f"ships: {s_id} and {other_ship.id} should swap"
-                            )
-
-                            swapped_ships.append(s_id)
-                            swapped_ships.append(other_ship.id)
-                            ship_move = other_ship.position - ship_position
-                            other_ship_move = ship_position - other_ship.position
-
-                            try:
-                                self.commands_queue[s_id] = ship.move(
-                                    (ship_move.x, ship_move.y))
-                                self.commands_queue[
-                                    other_ship.id] = other_ship.move(
-                                        (other_ship_move.x, other_ship_move.y))
-                            except IndexError:
-                                logging.error(
-                                    f"incorrect swap detected move {ship_move}  position {ship_position}"
-                                )
-                                logging.error(
-                                    f"incorrect swap detected move {other_ship_move}  position {other_ship.position}"
-                                )
-
-        self.command_queue = self.commands_queue.values()
-
-
-class Cluster:
-    def __init__(self, game_map: GameMap, center_cell: MapCell):
-        self.game_map = game_map
-        self.cluster_center = center_cell
-        self.cluster = [center_cell]
-        self.halite_multiplier = 1
-        for x in range(-1, 2):
-            for y in range(-1, 2):
-                try:
-                    cell = self.game_map[
-                        self.cluster_center.position.directional_offset((x,
-                                                                         y))]
-                    self.cluster.append(cell)
-                except Exception:
-                    logging.warn(f"can't find cell at {(x,y)}")
-
-    @property
-    def position(self):
-        return self.cluster_center.position
-
-    @property
-    def rich_position(self):
-        clusters = {
-            cluster.position: cluster.halite_amount
-            for cluster in self.cluster
-        }
-        high_val_pos = max(clusters, key=clusters.get)
-        return high_val_pos
-
-    @property
-    def halite_amount(self):
-        """
-        :return: total halite amount in 9 cell cluster
-        """
-        return (sum([cell.halite_amount
-                     for cell in self.cluster])) * self.halite_multiplier
-
-    def __eq__(self, other):
-        return self.halite_amount == other.halite_amount
-
-    def __ne__(self, other):
-        return not self.__eq__(other)
-
-    def __gt__(self, other):
-        return self.halite_amount > other.halite_amount
-
-    def __ge__(self, other):
-        return self.halite_amount >= other.halite_amount
-
-    def __lt__(self, other):
-        return self.halite_amount < other.halite_amount
-
-    def __le__(self, other):
-        return self.halite_amount <= other.halite_amount
-
-    def __repr__(self):
-        return f"Cluster {self.cluster_center}, halite: {self.halite_amount}"
+        """resolve the moves requested for all ships together and queue them"""
+        moves = self.resolver.resolve(self.ships)
+        for ship in self.ships:
+            if ship.id in self.commands:
+                # e.g. making a dropoff
+                continue
+            move = moves[ship.id]
+            self.command(ship, ship.move(move), move=move)
 
 
 class ShipState:
-    def __init__(self, mode, destination=None, prev_move=None):
+    """
+    A ship's plan: its mode from Modes, and its destination and preferred
+    move as flat cell indices, NO_CELL when unset
+    """
+    __slots__ = ("mode", "destination", "preferred_move")
+
+    def __init__(self, mode, destination=NO_CELL, preferred_move=NO_CELL):
         self.mode = mode
-        self.prev_move = prev_move
-        self.current_move = None
         self.destination = destination
-        self.preferred_move = None
-
-    def reset_moves(self):
-        self.current_move = None
+        self.preferred_move = preferred_move
 
     def __repr__(self):
-        return f"ShipState(mode: {self.mode}, prev_move:{self.prev_move}"
+        return (f"ShipState(mode: {Modes.NAMES[self.mode]}, "
+                f"destination: {self.destination}, "
+                f"preferred_move: {self.preferred_move})")
+
+
+class ShipStates:
+    """
+    ShipStates by ship id, for live ships only: sync adds new ships and
+    drops sunk ones, so its cost scales with the current fleet.
+    """
+
+    def __init__(self):
+        self._states = {}  # {ship.id: ShipState}
+
+    def __getitem__(self, ship_id):
+        return self._states[ship_id]
+
+    def __contains__(self, ship_id):
+        return ship_id in self._states
+
+    def __len__(self):
+        return len(self._states)
+
+    def values(self):
+        return self._states.values()
+
+    def sync(self, ships):
+        """match the states to the player's current ships"""
+        states = self._states
+        live = {ship.id for ship in ships}
+        if len(states) > len(live) or not live.issubset(states):
+            for ship_id in [ship_id for ship_id in states
+                            if ship_id not in live]:
+                del states[ship_id]
+            for ship_id in live.difference(states):
+                states[ship_id] = ShipState(Modes.COLLECTING)
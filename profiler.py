@@ -0,0 +1,100 @@
+import cProfile
+import functools
+import json
+import os
+import time
+
+# directory to write profiles to; profiling is off when unset
+PROFILE_ENV = "HALITE_PROFILE"
+# comma separated turn numbers to also dump cProfile stats for
+PROFILE_TURNS_ENV = "HALITE_PROFILE_TURNS"
+
+
+class TurnProfiler:
+    """
+    Per-turn timings of a game, written as one JSON line per turn: the
+    turn's ship count and map size, the time of each budget phase, and the
+    call count and time of each instrumented method (including the methods
+    it calls). Selected turns can also get a full cProfile dump.
+
+    Nothing is instrumented unless the profiler is enabled, so when it's
+    off the bot runs exactly as without it.
+    """
+
+    def __init__(self, directory=None, player_id=0, profile_turns=()):
+        self.enabled = directory is not None
+        self.profile_turns = set(profile_turns)
+        self._calls = {}  # {method name: [calls, seconds]}
+        self._cprofile = None
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            self._prefix = os.path.join(directory, f"profile_{player_id}")
+            self._output = open(self._prefix + ".jsonl", "w", buffering=1)
+
+    @classmethod
+    def from_environment(cls, player_id):
+        """a profiler set up from HALITE_PROFILE and HALITE_PROFILE_TURNS"""
+        turns = os.environ.get(PROFILE_TURNS_ENV, "")
+        return cls(os.environ.get(PROFILE_ENV), player_id,
+                   [int(turn) for turn in turns.split(",") if turn.strip()])
+
+    def instrument(self, obj, names=None):
+        """
+        Time calls of an object's methods, by default every method its class
+        defines (other than dunder methods).
+        """
+        if not self.enabled:
+            return
+        if names is None:
+            names = [name for name, value in vars(type(obj)).items()
+                     if callable(value) and not name.startswith("__")]
+        for name in names:
+            setattr(obj, name, self._timed(name, getattr(obj, name)))
+
+    def _timed(self, name, method):
+        calls = self._calls
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                counter = calls.get(name)
+                if counter is None:
+                    counter = calls[name] = [0, 0.0]
+                counter[0] += 1
+                counter[1] += clock() - start
+
+        return timed
+
+    def start_turn(self, turn):
+        """start a cProfile run if this turn was selected"""
+        if self.enabled and turn in self.profile_turns:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def end_turn(self, game, phases):
+        """
+        Write the turn's line and reset the counters. Calls made since the
+        last turn ended, like parsing the frame, count towards this turn.
+        """
+        if not self.enabled:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(
+                f"{self._prefix}_turn{game.turn_number}.prof")
+            self._cprofile = None
+
+        self._output.write(json.dumps({
+            "turn": game.turn_number,
+            "ships": len(game.me.get_ships()),
+            "map": [game.game_map.width, game.game_map.height],
+            "ms": {name: round(seconds * 1000, 3)
+                   for name, seconds in phases.items()},
+            "calls": {name: [count, round(seconds * 1000, 3)]
+                      for name, (count, seconds) in self._calls.items()},
+        }, separators=(",", ":")) + "\n")
+        self._calls.clear()
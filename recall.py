@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+from hlt import constants
+
+# ships a base takes in a turn once ships may stack on it: at most one from
+# each of its four neighbours, and in practice one of those is usually held
+# up by a ship in the way
+BASE_ARRIVALS = 3
+# turns of slack in every recall, for moves that are blocked or can't be paid
+RECALL_MARGIN = 2
+
+
+class RecallScheduler:
+    """
+    When each ship has to head home to be back by the end of the game.
+
+    Ships go home along the ReturnField, to their nearest base, taking as
+    many turns as the fewest moves there. A base can only take
+    BASE_ARRIVALS ships a turn, so each base's ships get arrival turns
+    counting back from the final turn, that many to a turn, the farthest
+    ships the latest. A ship is due home its path's length (plus
+    RECALL_MARGIN) before its arrival turn, so ships keep mining until just
+    in time and most arrive, stacking onto the base, on the final turn.
+
+    Until the first ship is due, ships are only rescheduled a third of the
+    way to it: ships get farther from home by at most a move a turn, so the
+    first recall can't come any sooner than that.
+    """
+
+    def __init__(self):
+        self.recall_turns = {}  # {ship.id: turn it is due home}
+        self.stacking_bases = set()  # positions of bases ships may pile onto
+        self.next_update = 0  # turn to reschedule on
+
+    def update(self, ships, return_field, turn_number):
+        """schedule this turn's ships; ships already on a base need no recall"""
+        if turn_number < self.next_update:
+            return
+        queues = defaultdict(list)  # {base position: [(moves, ship.id)]}
+        # moves on the shortest path home, not on the one burning the least
+        # halite, which could detour over empty cells and recall ships early
+        for ship in ships:
+            moves = return_field.distance(ship.position)
+            if moves:
+                queues[return_field.nearest_base(ship.position)].append(
+                    (moves, ship.id))
+
+        self.recall_turns = {}
+        for base, queue in queues.items():
+            queue.sort(reverse=True)
+            for rank, (moves, ship_id) in enumerate(queue):
+                # commands of the final turn still count
+                arrival = constants.MAX_TURNS - rank // BASE_ARRIVALS
+                self.recall_turns[ship_id] = \
+                    arrival - moves + 1 - RECALL_MARGIN
+            first_arrival = constants.MAX_TURNS - \
+                (len(queue) - 1) // BASE_ARRIVALS
+            if turn_number >= first_arrival - RECALL_MARGIN:
+                self.stacking_bases.add(base)
+
+        first_recall = min(self.recall_turns.values(),
+                           default=constants.MAX_TURNS)
+        self.next_update = turn_number + (first_recall - turn_number) // 3
+
+    def due(self, ship, turn_number):
+        """whether the ship has to head home this turn"""
+        return turn_number >= self.recall_turns.get(ship.id, float("inf"))
+
+    def stacking(self, base):
+        """whether ships may pile onto the base at a position, from its first arrivals on"""
+        return base in self.stacking_bases
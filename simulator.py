@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+In-process Halite III rules simulator, for offline self-play without the
+engine binary, subprocesses or the text protocol.
+
+Each bot plays through a real hlt.Game whose reader is fed integer frames
+straight from the simulator, so Navigation and MyBot run unchanged.
+
+Usage: python simulator.py [--games N] [--size 32] [--players 2]
+                           [--processes P] [--seed S] [bot ...]
+Bots are modules with a make_bot(game) function (module:function works too),
+defaulting to MyBot for every player.
+"""
+import argparse
+import collections
+import importlib
+import json
+import logging
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+import hlt
+from hlt import commands, constants
+from hlt.constants import DEFAULT_CONSTANTS, max_turns
+
+from clusters import diamond_sums
+
+STARTING_HALITE = 5000
+OFFSETS = {
+    commands.NORTH: (0, -1),
+    commands.SOUTH: (0, 1),
+    commands.EAST: (1, 0),
+    commands.WEST: (-1, 0),
+    commands.STAY_STILL: (0, 0),
+}
+
+
+class FeedReader:
+    """
+    Engine input for one bot's Game, handed over as integers by the
+    simulator instead of being read and parsed from text.
+    """
+
+    def __init__(self, game_constants):
+        self._constants = json.dumps(game_constants)
+        self._ints = collections.deque()
+        self.received = time.perf_counter()  # when the last frame was fed
+
+    def feed(self, ints):
+        self._ints.extend(ints)
+        self.received = time.perf_counter()
+
+    def readline(self):
+        return self._constants
+
+    def read_int(self):
+        return self._ints.popleft()
+
+    def read_ints(self, count):
+        popleft = self._ints.popleft
+        return [popleft() for _ in range(count)]
+
+
+class SimShip:
+    __slots__ = ("id", "owner", "x", "y", "halite")
+
+    def __init__(self, ship_id, owner, x, y):
+        self.id = ship_id
+        self.owner = owner
+        self.x = x
+        self.y = y
+        self.halite = 0
+
+
+class Simulator:
+    """
+    The game state and rules: spawning, dropoff conversion, moves and their
+    cost, collisions, deposits, mining with inspiration, as described in
+    docs/game-overview.md.
+    """
+
+    def __init__(self, num_players=2, size=32, seed=0, game_constants=None):
+        self.num_players = num_players
+        self.size = size
+        self.rng = np.random.RandomState(seed)
+        # the caller's constants win, MAX_TURNS included
+        self.constants = dict(DEFAULT_CONSTANTS, MAX_TURNS=max_turns(size))
+        self.constants.update(game_constants or {})
+        constants.load_constants(self.constants)
+
+        self.halite = self._generate_map()
+        self.shipyards = self._shipyard_positions()
+        self.structures = {}  # {cell index: owner}
+        for player, (x, y) in enumerate(self.shipyards):
+            self.structures[y * size + x] = player
+            self.halite[y, x] = 0
+        self.dropoffs = [[] for _ in range(num_players)]  # [(id, x, y)]
+        self.banks = [STARTING_HALITE] * num_players
+        self.ships = {}  # {ship id: SimShip}
+        self.inspired = set()  # ids of inspired ships
+        self.alive = [True] * num_players
+        self.changed = set()  # cell indices changed last turn
+        self.next_id = 0
+        self.turn = 0
+
+    def _generate_map(self):
+        """random halite, mirrored so every player starts alike"""
+        half = self.size // 2
+        rows = self.size if self.num_players == 2 else half
+        noise = self.rng.random_sample((rows, half))
+        for _ in range(2):
+            noise = (noise + np.roll(noise, 1, 0) + np.roll(noise, -1, 0)
+                     + np.roll(noise, 1, 1) + np.roll(noise, -1, 1)) / 5
+        noise = (noise - noise.min()) / (noise.max() - noise.min())
+        quadrant = (noise**3 * 1000).astype(np.int64)
+        halves = np.hstack([quadrant, quadrant[:, ::-1]])
+        if self.num_players == 2:
+            return halves
+        return np.vstack([halves, halves[::-1]])
+
+    def _shipyard_positions(self):
+        quarter = self.size // 4
+        far = self.size - 1 - quarter
+        if self.num_players == 2:
+            return [(quarter, self.size // 2), (far, self.size // 2)]
+        return [(quarter, quarter), (far, quarter), (quarter, far),
+                (far, far)]
+
+    def start_game(self, player):
+        """
+        Load a Game for a player, like the engine's initial input would
+        :return: the Game and the FeedReader to hand it frames through
+        """
+        reader = FeedReader(self.constants)
+        reader.feed([self.num_players, player])
+        for other, (x, y) in enumerate(self.shipyards):
+            reader.feed([other, x, y])
+        reader.feed([self.size, self.size])
+        reader.feed(self.halite.ravel().tolist())
+        return hlt.Game(array_map=True, reader=reader), reader
+
+    def frame(self):
+        """the integers of the next turn's frame, the same for every player"""
+        ints = [self.turn + 1]
+        for player in range(self.num_players):
+            fleet = [ship for ship in self.ships.values()
+                     if ship.owner == player]
+            ints.extend((player, len(fleet), len(self.dropoffs[player]),
+                         self.banks[player]))
+            for ship in fleet:
+                ints.extend((ship.id, ship.x, ship.y, ship.halite))
+            for dropoff in self.dropoffs[player]:
+                ints.extend(dropoff)
+        ints.append(len(self.changed))
+        for cell in self.changed:
+            y, x = divmod(cell, self.size)
+            ints.extend((x, y, int(self.halite[y, x])))
+        return ints
+
+    @property
+    def finished(self):
+        return self.turn >= self.constants["MAX_TURNS"] or \
+            sum(self.alive) <= 1
+
+    def step(self, player_commands):
+        """
+        Play one turn.
+        :param player_commands: {player id: list of command strings}
+        """
+        self.turn += 1
+        self.changed = set()
+        moves = {}
+        spawns = []
+        for player, issued in player_commands.items():
+            if self.alive[player]:
+                self._parse(player, " ".join(issued).split(), moves, spawns)
+
+        moved = self._move(moves)
+        for player in spawns:
+            x, y = self.shipyards[player]
+            self.ships[self.next_id] = SimShip(self.next_id, player, x, y)
+            moved.add(self.next_id)
+            self.next_id += 1
+        self._collide()
+        self._deposit()
+        self.inspired = self._inspiration()
+        self._mine(moved)
+
+        for player in range(self.num_players):
+            if not any(ship.owner == player for ship in self.ships.values()) \
+                    and self.banks[player] < constants.SHIP_COST:
+                self.alive[player] = False
+
+    def _parse(self, player, tokens, moves, spawns):
+        """apply constructions and spawns, and collect moves"""
+        i = 0
+        while i < len(tokens):
+            command = tokens[i]
+            if command == commands.GENERATE:
+                if self.banks[player] >= constants.SHIP_COST:
+                    self.banks[player] -= constants.SHIP_COST
+                    spawns.append(player)
+                i += 1
+                continue
+            ship = self.ships.get(int(tokens[i + 1]))
+            if ship is None or ship.owner != player:
+                logging.warning(f"player {player} sent {command} for a ship it doesn't own")
+            elif command == commands.CONSTRUCT:
+                self._construct(ship)
+            elif command == commands.MOVE:
+                moves[ship.id] = tokens[i + 2]
+            i += 3 if command == commands.MOVE else 2
+
+    def _construct(self, ship):
+        cell = ship.y * self.size + ship.x
+        credit = ship.halite + int(self.halite[ship.y, ship.x])
+        cost = constants.DROPOFF_COST - credit
+        if cell in self.structures or self.banks[ship.owner] < cost:
+            return
+        self.banks[ship.owner] -= cost
+        self.halite[ship.y, ship.x] = 0
+        self.changed.add(cell)
+        self.structures[cell] = ship.owner
+        self.dropoffs[ship.owner].append((self.next_id, ship.x, ship.y))
+        self.next_id += 1
+        del self.ships[ship.id]
+
+    def _move(self, moves):
+        """move ships that can pay for it, returning the ids of those that moved"""
+        moved = set()
+        for ship_id, direction in moves.items():
+            ship = self.ships.get(ship_id)
+            if ship is None or direction == commands.STAY_STILL:
+                continue
+            ratio = constants.INSPIRED_MOVE_COST_RATIO if ship_id in \
+                self.inspired else constants.MOVE_COST_RATIO
+            cost = int(self.halite[ship.y, ship.x]) // ratio
+            if ship.halite < cost:
+                continue
+            ship.halite -= cost
+            dx, dy = OFFSETS[direction]
+            ship.x = (ship.x + dx) % self.size
+            ship.y = (ship.y + dy) % self.size
+            moved.add(ship_id)
+        return moved
+
+    def _collide(self):
+        """sink every ship sharing a cell, dropping their cargo there"""
+        cells = collections.defaultdict(list)
+        for ship in self.ships.values():
+            cells[ship.y * self.size + ship.x].append(ship)
+        for cell, ships in cells.items():
+            if len(ships) < 2:
+                continue
+            cargo = sum(ship.halite for ship in ships)
+            if cell in self.structures:
+                self.banks[self.structures[cell]] += cargo
+            else:
+                self.halite.flat[cell] += cargo
+                self.changed.add(cell)
+            for ship in ships:
+                del self.ships[ship.id]
+
+    def _deposit(self):
+        for ship in self.ships.values():
+            if self.structures.get(ship.y * self.size + ship.x) == ship.owner:
+                self.banks[ship.owner] += ship.halite
+                ship.halite = 0
+
+    def _inspiration(self):
+        """ids of ships with enough enemy ships within the inspiration radius"""
+        if not constants.INSPIRATION_ENABLED or not self.ships:
+            return set()
+        fleets = np.zeros((self.num_players, self.size, self.size), dtype=np.int64)
+        for ship in self.ships.values():
+            fleets[ship.owner, ship.y, ship.x] += 1
+        nearby = [diamond_sums(fleet, constants.INSPIRATION_RADIUS)
+                  for fleet in fleets]
+        everyone = sum(nearby)
+        return {
+            ship.id for ship in self.ships.values()
+            if everyone[ship.y, ship.x] - nearby[ship.owner][ship.y, ship.x]
+            >= constants.INSPIRATION_SHIP_COUNT
+        }
+
+    def _mine(self, moved):
+        for ship in self.ships.values():
+            if ship.id in moved:
+                continue
+            halite = int(self.halite[ship.y, ship.x])
+            inspired = ship.id in self.inspired
+            ratio = constants.INSPIRED_EXTRACT_RATIO if inspired else \
+                constants.EXTRACT_RATIO
+            extracted = min(-(-halite // ratio),
+                            constants.MAX_HALITE - ship.halite)
+            if extracted <= 0:
+                continue
+            self.halite[ship.y, ship.x] -= extracted
+            self.changed.add(ship.y * self.size + ship.x)
+            ship.halite += extracted
+            if inspired:
+                ship.halite = min(
+                    constants.MAX_HALITE, ship.halite
+                    + int(extracted * constants.INSPIRED_BONUS_MULTIPLIER))
+
+    def results(self):
+        """final scores and ranks (1 is the winner) per player"""
+        order = sorted(range(self.num_players),
+                       key=lambda player: (self.alive[player],
+                                           self.banks[player]),
+                       reverse=True)
+        return {
+            "turns": self.turn,
+            "scores": list(self.banks),
+            "ranks": [order.index(player) + 1
+                      for player in range(self.num_players)],
+        }
+
+
+def load_bot(spec):
+    """the make_bot function named by 'module' or 'module:function'"""
+    module, _, function = spec.partition(":")
+    return getattr(importlib.import_module(module), function or "make_bot")
+
+
+def run_game(bot_factories, size=32, seed=0, game_constants=None):
+    """
+    Play a whole game between bots.
+    :param bot_factories: one function per player taking that player's Game and returning its per-turn bot function
+    :return: the simulator's results, plus the wall time taken
+    """
+    start = time.perf_counter()
+    root = logging.getLogger()
+    if not root.handlers:
+        # keeps each Game from opening a log file
+        root.addHandler(logging.NullHandler())
+    random.seed(seed)
+    simulator = Simulator(len(bot_factories), size, seed, game_constants)
+    players = [simulator.start_game(player)
+               for player in range(len(bot_factories))]
+    bots = [factory(game)
+            for factory, (game, _) in zip(bot_factories, players)]
+
+    while not simulator.finished:
+        frame = simulator.frame()
+        player_commands = {}
+        for player, (game, reader) in enumerate(players):
+            if simulator.alive[player]:
+                reader.feed(frame)
+                game.update_frame()
+                player_commands[player] = bots[player](game)
+        simulator.step(player_commands)
+
+    results = simulator.results()
+    results["seconds"] = time.perf_counter() - start
+    return results
+
+
+def _play(job):
+    bot_specs, size, seed = job
+    return run_game([load_bot(spec) for spec in bot_specs], size, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("bots", nargs="*", default=[])
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--players", type=int, default=2, choices=(2, 4))
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    bot_specs = (args.bots or ["MyBot"]) * args.players
+    bot_specs = bot_specs[:args.players]
+
+    jobs = [(bot_specs, args.size, args.seed + game)
+            for game in range(args.games)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        games = pool.map(_play, jobs)
+    elapsed = time.perf_counter() - start
+
+    for player, spec in enumerate(bot_specs):
+        wins = sum(game["ranks"][player] == 1 for game in games)
+        mean_score = sum(game["scores"][player] for game in games) / len(games)
+        print(f"player {player} ({spec}): {wins}/{len(games)} wins, "
+              f"mean score {mean_score:.0f}")
+    print(f"{len(games)} games in {elapsed:.1f}s "
+          f"({len(games) / elapsed * 3600:.0f} games/hour)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import heapq
+
+
+class ReservationTable:
+    """
+    The cells our ships have claimed for each of the next `horizon` turns,
+    so ships planning after them can route around their paths.
+
+    Turns are rows of a ring buffer, each a {cell: ship id} dict: advancing
+    to a new turn clears only the rows that fall out of the window, so
+    memory is bounded by horizon * ships and paths stay reserved from one
+    turn to the next without being replanned.
+    """
+
+    def __init__(self, horizon):
+        self.horizon = horizon
+        self.turn = 0  # the turn the window starts at
+        self._rows = [{} for _ in range(horizon)]
+        self._paths = {}  # {ship.id: (turn the path starts on, [cells])}
+
+    def advance(self, turn):
+        """start the window at this turn, dropping the reservations before it"""
+        if turn - self.turn >= self.horizon:
+            self._rows = [{} for _ in range(self.horizon)]
+        else:
+            for past in range(self.turn, turn):
+                self._rows[past % self.horizon] = {}
+        self.turn = turn
+
+    def holder(self, cell, turn):
+        """id of the ship that reserved a cell on a turn in the window, None if free"""
+        return self._rows[turn % self.horizon].get(cell)
+
+    def reserve(self, ship_id, turn, cells):
+        """claim a ship's path: cells[i] on turn + i, as far as the window goes"""
+        self.release(ship_id)
+        for offset, cell in enumerate(cells[:self.turn + self.horizon - turn]):
+            self._rows[(turn + offset) % self.horizon][cell] = ship_id
+        self._paths[ship_id] = (turn, cells)
+
+    def release(self, ship_id):
+        """drop a ship's path and the reservations left of it"""
+        start, cells = self._paths.pop(ship_id, (0, ()))
+        for offset, cell in enumerate(cells):
+            turn = start + offset
+            if self.turn <= turn < self.turn + self.horizon:
+                row = self._rows[turn % self.horizon]
+                if row.get(cell) == ship_id:
+                    del row[cell]
+
+    def path(self, ship_id, cell):
+        """
+        the rest of a ship's path from this turn on, if it is still on it at
+        this cell, else None
+        """
+        start, cells = self._paths.get(ship_id, (0, ()))
+        offset = self.turn - start
+        if 0 <= offset < len(cells) and cells[offset] == cell:
+            return cells[offset:]
+        return None
+
+    def sync(self, ship_ids):
+        """release the paths of ships that are gone"""
+        for ship_id in [ship_id for ship_id in self._paths
+                        if ship_id not in ship_ids]:
+            self.release(ship_id)
+
+
+def plan_path(table, ship_id, start, goal, heuristic, neighbour_indices,
+              window, next_cell=None, blocked=(), sinks=(),
+              max_expansions=500):
+    """
+    Cooperative A* over cells and turns: the quickest way from start towards
+    goal over the next `window` turns, moving or staying put each turn,
+    through cells no other ship reserved for the turn it gets there.
+
+    :param heuristic: flat list of each cell's estimated turns to goal, no
+        more than the fewest moves there, e.g. a ReturnField's steps or the
+        Manhattan distance
+    :param next_cell: flat list of each cell's next cell on a field's path,
+        taken first among equally quick moves
+    :param blocked: cells the ship may not enter next turn, e.g. enemy ships
+    :param sinks: cells any number of ships may share, e.g. bases in the endgame
+    :return: cells from start, one per turn, ending on goal or after window
+        turns (or at the best cell reached within max_expansions), None if no
+        cell but the start is reachable
+    """
+    turn = table.turn
+    # (turns + estimate, estimate, off the cheapest path, turns, cell)
+    heap = [(heuristic[start], heuristic[start], False, 0, start)]
+    parents = {(start, 0): None}
+    best = (heuristic[start], 0, start)  # (estimate, turns, cell)
+    expansions = 0
+    while heap and expansions < max_expansions:
+        _, estimate, _, offset, cell = heapq.heappop(heap)
+        if cell == goal or offset == window:
+            best = (estimate, offset, cell)
+            break
+        if (estimate, offset) < best[:2] or best[1] == 0:
+            best = (estimate, offset, cell)
+        expansions += 1
+        following = offset + 1
+        for neighbour in (cell,) + neighbour_indices[cell]:
+            if (neighbour, following) in parents or \
+                    following == 1 and neighbour in blocked:
+                continue
+            if neighbour not in sinks:
+                holder = table.holder(neighbour, turn + following)
+                if holder is not None and holder != ship_id:
+                    continue
+            parents[neighbour, following] = (cell, offset)
+            detour = next_cell is not None and neighbour != next_cell[cell]
+            heapq.heappush(heap, (following + heuristic[neighbour],
+                                  heuristic[neighbour], detour, following,
+                                  neighbour))
+
+    _, offset, cell = best
+    node = (cell, offset)
+    if offset == 0:
+        return None
+    cells = []
+    while node is not None:
+        cells.append(node[0])
+        node = parents[node]
+    cells.reverse()
+    return cells
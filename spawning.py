@@ -0,0 +1,71 @@
+from collections import deque
+
+from hlt import constants
+
+# turns of income the fleet's income per ship turn is measured over
+INCOME_WINDOW = 50
+# turns a new ship takes to start bringing halite home
+SPAWN_RAMP_TURNS = 20
+# share of its fair share of the halite left a ship can expect to bring home
+HALITE_CAPTURE = 0.7
+
+
+class SpawnModel:
+    """
+    Whether one more ship would pay for itself: what it could bring home in
+    the turns left at the fleet's recent income per ship turn, but no more
+    than its share of the halite left on the map among every ship in the
+    game.
+
+    Income is measured from our bank each turn, its change plus what was
+    spent, over the last INCOME_WINDOW turns. Until there are that many, a
+    rate guessed from the halite per cell is used if it's higher, as the
+    first ships take a while to bring anything home.
+    """
+
+    def __init__(self, game):
+        self.bank = game.me.halite_amount
+        self.ships = len(game.me.get_ships())
+        self._turns = deque()  # (income, ships) for the turns in the window
+        self.income = 0  # halite brought home over the window
+        self.ship_turns = 0  # ships summed over the window's turns
+
+    def observe(self, game, spent):
+        """
+        record last turn's income
+        :param spent: Halite spent last turn, on ships and dropoffs
+        """
+        bank = game.me.halite_amount
+        income = bank - self.bank + spent
+        self._turns.append((income, self.ships))
+        self.income += income
+        self.ship_turns += self.ships
+        if len(self._turns) > INCOME_WINDOW:
+            old_income, old_ships = self._turns.popleft()
+            self.income -= old_income
+            self.ship_turns -= old_ships
+        self.bank = bank
+        self.ships = len(game.me.get_ships())
+
+    def income_rate(self, halite_per_cell):
+        """halite a ship brings home per turn"""
+        rate = self.income / self.ship_turns if self.ship_turns else 0
+        if len(self._turns) < INCOME_WINDOW:
+            # mining an average cell about half the time
+            rate = max(rate, halite_per_cell / (2 * constants.EXTRACT_RATIO))
+        return rate
+
+    def ship_value(self, game, total_halite, halite_per_cell):
+        """halite one more ship is expected to bring home this game"""
+        turns_left = constants.MAX_TURNS - game.turn_number
+        by_income = self.income_rate(halite_per_cell) * max(
+            0, turns_left - SPAWN_RAMP_TURNS)
+        ships = sum(len(player.get_ships())
+                    for player in game.players.values())
+        by_share = total_halite * HALITE_CAPTURE / (ships + 1)
+        return min(by_income, by_share)
+
+    def worth_spawning(self, game, total_halite, halite_per_cell):
+        """whether one more ship would bring home more than it costs"""
+        return self.ship_value(game, total_halite, halite_per_cell) > \
+            constants.SHIP_COST
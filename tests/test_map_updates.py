@@ -0,0 +1,86 @@
+"""
+GameMap updates clear only the cells marked with a ship since the last
+update; they must leave the map as the old sweep over every cell did.
+"""
+import io
+import random
+
+import hlt
+from hlt.common import FrameReader
+from hlt.game_map import ArrayGameMap, GameMap
+
+from benchmarks.streams import synthetic_stream
+
+# random cells marked unsafe per turn on top of the ships' own cells
+EXTRA_MARKS = 20
+
+
+class SweepGameMap(GameMap):
+    """GameMap cleared the old way, by resetting every cell"""
+
+    def _apply_updates(self, cell_ints):
+        for row in self._cells:
+            for cell in row:
+                cell.ship = None
+        super()._apply_updates(cell_ints)
+
+
+class SweepArrayGameMap(ArrayGameMap):
+    """ArrayGameMap cleared the old way, by resetting the whole grid"""
+
+    def _apply_updates(self, cell_ints):
+        self.ship_owner.fill(-1)
+        self._ships.clear()
+        super()._apply_updates(cell_ints)
+
+
+def map_state(game_map):
+    """per cell, in flat index order, whether it is occupied and its halite"""
+    cells = [game_map[position] for position in game_map.positions.positions]
+    return ([cell.is_occupied for cell in cells],
+            [cell.halite_amount for cell in cells])
+
+
+def mark_extra(game, rng):
+    """mark a few random cells unsafe with one of the game's ships, as navigation does"""
+    ships = [ship for player in game.players.values()
+             for ship in player.get_ships()]
+    if not ships:
+        return
+    for _ in range(EXTRA_MARKS):
+        position = rng.choice(game.game_map.positions.positions)
+        game.game_map[position].mark_unsafe(rng.choice(ships))
+
+
+def replay(array_map, sweep_class):
+    """play a small synthetic stream through a map cleared cell by cell and one swept in full"""
+    stream = synthetic_stream(size=16, turns=30, num_players=4, max_ships=20)
+    games = []
+    for sweep in (False, True):
+        game = hlt.Game(array_map=array_map,
+                        reader=FrameReader(io.BytesIO(stream)))
+        if sweep:
+            game.game_map.__class__ = sweep_class
+        games.append((game, random.Random(0)))
+
+    turns = 0
+    while True:
+        states = []
+        for game, rng in games:
+            try:
+                game.update_frame()
+            except SystemExit:
+                return turns
+            mark_extra(game, rng)
+            states.append(map_state(game.game_map))
+        turns += 1
+        assert states[0] == states[1], \
+            "maps differ on turn {}".format(games[0][0].turn_number)
+
+
+def test_game_map_matches_full_sweep():
+    assert replay(False, SweepGameMap) == 30
+
+
+def test_array_game_map_matches_full_sweep():
+    assert replay(True, SweepArrayGameMap) == 30
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def enemy_occupancy(game, game_map):
+    """grid of 1 on the cells holding an enemy ship, 0 elsewhere"""
+    owners = game_map.ship_owner
+    return ((owners >= 0) & (owners != game.my_id)).astype(np.int64)
+
+
+def neighbourhood_sums(grid):
+    """sum of every toroidal grid cell and its four neighbours"""
+    return (grid + np.roll(grid, 1, axis=0) + np.roll(grid, -1, axis=0)
+            + np.roll(grid, 1, axis=1) + np.roll(grid, -1, axis=1))
+
+
+class ThreatMap:
+    """
+    Where enemy ships could be at the end of this turn: every cell an enemy
+    ship is on or next to, with how many enemy ships can reach it.
+
+    Built from the ArrayGameMap's ship_owner grid in a few array operations,
+    and kept apart from the map's occupancy and our own move reservations.
+    """
+
+    def __init__(self, game, game_map):
+        self.update(game, game_map)
+
+    def update(self, game, game_map):
+        """recompute the grids from this turn's enemy ships"""
+        self.occupancy = enemy_occupancy(game, game_map)
+        self.counts = neighbourhood_sums(self.occupancy)
+        self.threatened = self.counts.ravel() > 0
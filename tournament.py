@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Local tournament between bots, played with the halite engine binary.
+
+Games are spread over a process pool using every core. Each game gets its own
+seed, a map size from --sizes and a 2 or 4 player layout from --players. The
+first bot is the candidate, and every game pits it against opponents drawn
+from the other bots. The engine's JSON results are parsed to report each
+bot's win rate with a 95% Wilson interval, and the wall time per game.
+Every game runs in its own temporary directory, so the bot-N.log files of
+games played at once don't overwrite each other.
+
+Usage: python tournament.py [--games N] [--sizes 32 48 64] [--players 2 4]
+                            [--oldbots] [bot.py ...]
+With no bots, MyBot.py plays oldbots/MyBot_v10.py.
+"""
+import argparse
+import collections
+import glob
+import json
+import math
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_BOTS = ["MyBot.py", os.path.join("oldbots", "MyBot_v10.py")]
+DEFAULT_ENGINE = "halite.exe" if sys.platform == "win32" else "./halite"
+MAP_SIZES = [32, 40, 48, 56, 64]
+# z for a 95% confidence interval
+Z_95 = 1.96
+
+GameSpec = collections.namedtuple("GameSpec",
+                                  ["number", "seed", "size", "bots"])
+
+
+def wilson_interval(wins, games, z=Z_95):
+    """the Wilson score interval of a win rate, as (low, high)"""
+    if games == 0:
+        return 0.0, 1.0
+    rate = wins / games
+    denominator = 1 + z**2 / games
+    center = (rate + z**2 / (2 * games)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / games
+                           + z**2 / (4 * games**2)) / denominator
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+def schedule(bots, games, sizes, layouts, seed):
+    """
+    The games to play: the candidate (first bot) takes a rotating seat
+    against opponents drawn from the rest.
+    """
+    rng = random.Random(seed)
+    opponents = bots[1:] or bots
+    specs = []
+    for number in range(games):
+        players = layouts[number % len(layouts)]
+        seats = [opponents[(number + seat) % len(opponents)]
+                 for seat in range(players - 1)]
+        seats.insert(number % players, bots[0])
+        specs.append(GameSpec(number, rng.randrange(1, 2**31),
+                              rng.choice(sizes), seats))
+    return specs
+
+
+def play(spec, engine, python, replay_directory=None, timeout=None):
+    """
+    Run one game through the engine, in a temporary working directory of its own.
+    :return: dict of the game spec, wall time, and per seat rank, score and whether the bot was terminated
+    """
+    # paths from the tournament's directory still work from the game's
+    engine, python = (os.path.abspath(path) if os.path.dirname(path) else path
+                      for path in (engine, python))
+    command = [engine, "--results-as-json", "--no-logs",
+               "--seed", str(spec.seed),
+               "--width", str(spec.size), "--height", str(spec.size)]
+    if replay_directory:
+        command += ["--replay-directory", os.path.abspath(replay_directory)]
+    else:
+        command.append("--no-replay")
+    command += [f"{python} {os.path.abspath(bot)}" for bot in spec.bots]
+
+    start = time.perf_counter()
+    result = {"game": spec.number, "seed": spec.seed, "size": spec.size,
+              "bots": spec.bots}
+    try:
+        with tempfile.TemporaryDirectory(
+                prefix=f"game-{spec.number}-") as directory:
+            completed = subprocess.run(command, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, cwd=directory,
+                                       timeout=timeout, universal_newlines=True)
+        stats = json.loads(completed.stdout)
+    except (subprocess.SubprocessError, OSError, ValueError) as error:
+        result["error"] = str(error)
+        return result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+    result["seats"] = [{
+        "rank": stats["stats"][str(seat)]["rank"],
+        "score": stats["stats"][str(seat)]["score"],
+        "terminated": stats.get("terminated", {}).get(str(seat), False),
+    } for seat in range(len(spec.bots))]
+    return result
+
+
+def _play(job):
+    return play(*job)
+
+
+def summarize(bots, results):
+    """print each bot's win rate with its confidence interval, and game timings"""
+    played = [result for result in results if "seats" in result]
+    failed = len(results) - len(played)
+    records = collections.OrderedDict(
+        (bot, {"games": 0, "wins": 0, "score": 0, "terminated": 0})
+        for bot in bots)
+    for result in played:
+        for bot, seat in zip(result["bots"], result["seats"]):
+            record = records[bot]
+            record["games"] += 1
+            record["wins"] += seat["rank"] == 1
+            record["score"] += seat["score"]
+            record["terminated"] += seat["terminated"]
+
+    for bot, record in records.items():
+        if not record["games"]:
+            continue
+        low, high = wilson_interval(record["wins"], record["games"])
+        print(f"{bot}: won {record['wins']}/{record['games']} "
+              f"({record['wins'] / record['games']:.1%}, "
+              f"95% CI {low:.1%}-{high:.1%}), "
+              f"mean score {record['score'] / record['games']:.0f}, "
+              f"terminated {record['terminated']}")
+
+    if played:
+        seconds = sorted(result["seconds"] for result in played)
+        print(f"{len(played)} games, {failed} failed; per game "
+              f"mean {sum(seconds) / len(seconds):.1f}s, "
+              f"median {seconds[len(seconds) // 2]:.1f}s, "
+              f"max {seconds[-1]:.1f}s")
+    else:
+        print(f"no games finished, {failed} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("bots", nargs="*",
+                        help="bot scripts, the first being the candidate")
+    parser.add_argument("--oldbots", action="store_true",
+                        help="add every bot in oldbots/ as an opponent")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=MAP_SIZES)
+    parser.add_argument("--players", type=int, nargs="+", default=[2],
+                        choices=(2, 4))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None,
+                        help="games at once, defaults to the number of cores")
+    parser.add_argument("--engine", default=DEFAULT_ENGINE)
+    parser.add_argument("--python", default=sys.executable)
+    parser.add_argument("--replays", default=None,
+                        help="directory to save replays in, none by default")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="seconds before a game is abandoned")
+    parser.add_argument("--output", default=None,
+                        help="file to write each game's results to, as JSON lines")
+    args = parser.parse_args()
+
+    bots = args.bots or list(DEFAULT_BOTS)
+    if args.oldbots:
+        bots += [bot for bot in sorted(glob.glob(os.path.join(
+            "oldbots", "MyBot*.py"))) if bot not in bots]
+    specs = schedule(bots, args.games, args.sizes, args.players, args.seed)
+    jobs = [(spec, args.engine, args.python, args.replays, args.timeout)
+            for spec in specs]
+
+    start = time.perf_counter()
+    results = []
+    with multiprocessing.Pool(args.processes) as pool:
+        for result in pool.imap_unordered(_play, jobs):
+            results.append(result)
+            if "error" in result:
+                print(f"game {result['game']} (seed {result['seed']}) "
+                      f"failed: {result['error']}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w") as output:
+            for result in sorted(results, key=lambda result: result["game"]):
+                output.write(json.dumps(result) + "\n")
+
+    summarize(bots, results)
+    print(f"tournament took {elapsed:.0f}s")
+
+
+if __name__ == "__main__":
+    main()